@@ -0,0 +1,135 @@
+"""
+Versioned, checksummed binary artifacts for compiled engine data.
+
+An artifact is a pickle (protocol 5) whose large buffers, such as NumPy arrays, are stored
+out of band and 64-byte aligned after it. Loading maps the file read-only and hands those
+buffers to the unpickler as views of the mapping, so arrays are not copied and their pages
+are read (and shared between processes) only when touched.
+
+    magic | header length (uint32 LE) | header JSON | pickle | aligned buffers
+
+The header carries caller-supplied metadata, used to tell whether the artifact is stale,
+and a SHA-256 of everything after it.
+"""
+import hashlib
+import io
+import json
+import mmap
+import os
+import pickle
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+MAGIC = b"RECENG\x00\x01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+
+class ArtifactError(Exception):
+    """The artifact is missing, truncated, corrupt or in an unknown format"""
+
+
+class _AliasingUnpickler(pickle.Unpickler):
+    def __init__(self, file, aliases: Dict[str, str], **kwargs):
+        super().__init__(file, **kwargs)
+        self.aliases = aliases
+
+    def find_class(self, module, name):
+        return super().find_class(self.aliases.get(module, module), name)
+
+
+def _align(offset: int) -> int:
+    return -offset % ALIGNMENT
+
+
+def write_artifact(path: str, obj: Any, metadata: Dict[str, Any]) -> int:
+    """Serialize obj to path atomically; returns the artifact size in bytes"""
+    buffers = []
+    payload = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    raw_buffers = [buffer.raw() for buffer in buffers]
+
+    # Lay out the pickle and buffers relative to the start of the data section
+    layout, position = [], len(payload)
+    for raw in raw_buffers:
+        position += _align(position)
+        layout.append([position, raw.nbytes])
+        position += raw.nbytes
+
+    digest = hashlib.sha256(payload)
+    data_end = len(payload)
+    for (offset, _), raw in zip(layout, raw_buffers):
+        digest.update(b"\0" * (offset - data_end))
+        digest.update(raw)
+        data_end = offset + raw.nbytes
+
+    header = json.dumps({
+        "format": FORMAT_VERSION,
+        "metadata": metadata,
+        "pickle_bytes": len(payload),
+        "buffers": layout,
+        "sha256": digest.hexdigest(),
+    }).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header)) + header
+    # The data section starts aligned so buffer alignment holds in the file too
+    prefix += b"\0" * _align(len(prefix))
+
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, "wb") as f:
+        f.write(prefix)
+        f.write(payload)
+        written = len(payload)
+        for (offset, _), raw in zip(layout, raw_buffers):
+            f.write(b"\0" * (offset - written))
+            f.write(raw)
+            written = offset + raw.nbytes
+    os.replace(temporary, path)
+    return len(prefix) + written
+
+
+def read_header(path: str) -> Tuple[Dict[str, Any], int]:
+    """The artifact's header and the file offset of its data section, without reading the data"""
+    try:
+        with open(path, "rb") as f:
+            start = f.read(len(MAGIC) + 4)
+            if len(start) < len(MAGIC) + 4 or not start.startswith(MAGIC):
+                raise ArtifactError(f"{path} is not an engine artifact")
+            (header_length,) = struct.unpack("<I", start[len(MAGIC):])
+            header = json.loads(f.read(header_length))
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"Cannot read artifact header from {path}: {e}") from e
+    if header.get("format") != FORMAT_VERSION:
+        raise ArtifactError(f"{path} has artifact format {header.get('format')}, expected {FORMAT_VERSION}")
+    data_start = len(MAGIC) + 4 + header_length
+    return header, data_start + _align(data_start)
+
+
+def read_artifact(path: str, expected: Optional[Dict[str, Any]] = None, aliases: Optional[Dict[str, str]] = None,
+                  verify: bool = True) -> Any:
+    """Load an artifact, memory-mapping its buffers.
+
+    Raises ArtifactError if the file is unusable or any expected metadata value differs;
+    aliases maps module names recorded in the pickle to the names to import them from.
+    """
+    header, data_start = read_header(path)
+    for key, value in (expected or {}).items():
+        if header["metadata"].get(key) != value:
+            raise ArtifactError(f"{path} is stale: {key} is {header['metadata'].get(key)!r}, expected {value!r}")
+
+    with open(path, "rb") as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            raise ArtifactError(f"Cannot map {path}: {e}") from e
+    data = memoryview(mapping)[data_start:]
+    end = max([header["pickle_bytes"]] + [offset + length for offset, length in header["buffers"]])
+    if len(data) < end:
+        raise ArtifactError(f"{path} is truncated")
+    if verify and hashlib.sha256(data[:end]).hexdigest() != header["sha256"]:
+        raise ArtifactError(f"{path} failed its checksum")
+
+    payload = data[:header["pickle_bytes"]]
+    buffers = [data[offset:offset + length] for offset, length in header["buffers"]]
+    try:
+        return _AliasingUnpickler(io.BytesIO(payload), aliases or {}, buffers=buffers).load()
+    except Exception as e:
+        raise ArtifactError(f"Cannot unpickle {path}: {e}") from e
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+In-process benchmark suite for the recommendation engine and API.
+
+Drives the FastAPI app through an ASGI transport (no server, no network), reports
+throughput and latency percentiles per stage, and can save a JSON baseline and fail
+when a later run regresses past a threshold:
+
+    python benchmark.py --save-baseline baseline.json
+    python benchmark.py --baseline baseline.json --threshold 0.25
+
+Every run also times the engine against the original per-agent scorer (reference_scorer.py)
+on the same descriptions, with the signals the original lacked switched off, and fails when
+the engine is slower than the code it replaced by more than the threshold.
+
+Startup (module import, then loading the engine compiled or from a prebuilt artifact) is
+timed in fresh subprocesses, since this process has already imported everything.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+import reference_scorer
+from main import CODECS, KNOWLEDGE_BASE_PATH, EngineSnapshot, app, build_engine_artifact, engine, load_knowledge_base
+from metrics import percentile
+
+FILLER_WORDS = [
+    "the", "a", "with", "for", "and", "using", "our", "existing", "new", "feature", "page",
+    "users", "data", "service", "module", "support", "integrate", "build", "create", "improve",
+    "react", "python", "django", "postgres", "dashboard", "login", "payments", "reports",
+    "tests", "performance", "cache", "queue", "notifications", "settings", "search",
+]
+
+# Engine benchmarks gated against the original scorer timed on the same descriptions
+ORIGINAL_SCORER_PAIRS = [
+    ("engine_scorer", "original_scorer"),
+    ("engine_scorer_long", "original_scorer_long"),
+]
+
+# (name, words per description, fraction of words drawn from the engine's keyword vocabulary)
+CORPUS_PROFILES = [
+    ("short_sparse", (5, 15), 0.1),
+    ("short_dense", (5, 15), 0.5),
+    ("medium", (30, 80), 0.2),
+    ("long_sparse", (200, 400), 0.05),
+    ("long_dense", (200, 400), 0.3),
+]
+
+
+def generate_corpus(size, seed=0):
+    """Build a reproducible set of task descriptions with varied lengths and keyword densities"""
+    rng = random.Random(seed)
+    vocabulary = sorted(engine.matcher.patterns)
+    corpus = []
+    for i in range(size):
+        _, (low, high), density = CORPUS_PROFILES[i % len(CORPUS_PROFILES)]
+        words = [
+            rng.choice(vocabulary) if rng.random() < density else rng.choice(FILLER_WORDS)
+            for _ in range(rng.randint(low, high))
+        ]
+        corpus.append(" ".join(words).capitalize())
+    return corpus
+
+
+def summarize(samples_ns, operations):
+    """Latency percentiles in microseconds plus throughput in operations per second"""
+    samples = sorted(samples_ns)
+    total_seconds = sum(samples) / 1e9
+    return {
+        "operations": operations,
+        "throughput_per_s": round(operations / total_seconds, 1) if total_seconds else 0.0,
+        "p50_us": round(percentile(samples, 0.50) / 1e3, 2),
+        "p95_us": round(percentile(samples, 0.95) / 1e3, 2),
+        "p99_us": round(percentile(samples, 0.99) / 1e3, 2),
+    }
+
+
+def time_calls(fn, inputs):
+    samples = []
+    for item in inputs:
+        start = time.perf_counter_ns()
+        fn(item)
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+def bench_analyze_task(corpus):
+    return summarize(time_calls(engine.analyze_task, corpus), len(corpus))
+
+
+def bench_calculate_score(corpus):
+    """Time the per-agent scoring of each description (one sample covers every agent)"""
+    # Keyword matching is part of analyze_task's cost, so hand calculate_score the matches
+    matches = [engine.match_keywords(description) for description in corpus]
+    analyses = [engine.analyze_task(description, m) for description, m in zip(corpus, matches)]
+
+    def score_all(i):
+        for agent_name in engine.knowledge_base:
+            engine.calculate_score(agent_name, corpus[i], analyses[i], matches[i])
+
+    return summarize(time_calls(score_all, range(len(corpus))), len(corpus))
+
+
+def bench_generate_justification(corpus):
+    cases = []
+    for description in corpus:
+        analysis = engine.analyze_task(description)
+        for agent_name in engine.knowledge_base:
+            cases.append((agent_name, engine.calculate_score(agent_name, description, analysis), analysis))
+    return summarize(time_calls(lambda case: engine.generate_justification(*case), cases), len(cases))
+
+
+def bench_original_scorer(corpus):
+    """Analysis and scoring of every agent by the original per-agent scorer, one sample per description"""
+    agents, keyword_weights, _ = load_knowledge_base(KNOWLEDGE_BASE_PATH)
+    return summarize(
+        time_calls(lambda description: reference_scorer.score_agents(agents, keyword_weights, description), corpus),
+        len(corpus),
+    )
+
+
+def bench_engine_scorer(corpus):
+    """The same work through the compiled engine: one keyword scan, the analysis and the score vector"""
+    # Switch off the BM25 and semantic signals so the engine computes exactly what the original did
+    agents, keyword_weights, scoring = load_knowledge_base(KNOWLEDGE_BASE_PATH)
+    snapshot = EngineSnapshot(agents, keyword_weights, scoring={**scoring, "bm25": {"weight": 0}, "semantic": {"weight": 0}})
+
+    def score(description):
+        matches = snapshot.match_keywords(description)
+        snapshot.score_agents(snapshot.analyze_task(description, matches), matches)
+
+    return summarize(time_calls(score, corpus), len(corpus))
+
+
+async def _post_all(corpus, options, headers):
+    samples = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", headers=headers) as client:
+        for description in corpus:
+            start = time.perf_counter_ns()
+            response = await client.post("/recommend", json={"description": description, **options})
+            samples.append(time.perf_counter_ns() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"/recommend returned {response.status_code}: {response.text[:200]}")
+    return samples
+
+
+def bench_recommend(corpus, cached, options=None, headers=None):
+    """End-to-end /recommend; uncached runs disable the signature cache to measure the full pipeline.
+    
+    options are extra request fields (e.g. a fields projection) and headers extra request headers.
+    """
+    maxsize = engine.response_cache.maxsize
+    engine.response_cache.clear()
+    if not cached:
+        engine.response_cache.maxsize = 0
+    try:
+        return summarize(asyncio.run(_post_all(corpus, options or {}, headers)), len(corpus))
+    finally:
+        engine.response_cache.maxsize = maxsize
+        engine.response_cache.clear()
+
+
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter_ns()
+import main
+imported = time.perf_counter_ns()
+main.engine.ensure_loaded()
+print(imported - start, time.perf_counter_ns() - imported, main.engine.loaded_from)
+"""
+
+
+def _time_startup(artifact_path, expected_source):
+    env = dict(os.environ, ENGINE_ARTIFACT_PATH=artifact_path, KNOWLEDGE_BASE_PATH=KNOWLEDGE_BASE_PATH)
+    output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], env=env, cwd=Path(__file__).parent,
+                            capture_output=True, text=True, check=True).stdout.split()
+    if output[2] != expected_source:
+        raise RuntimeError(f"Engine was {output[2]}, expected {expected_source}")
+    return int(output[0]), int(output[1])
+
+
+def bench_startup(runs):
+    """Cold import plus engine load, compiling from the knowledge base versus reading an artifact"""
+    imports, compiled, loaded = [], [], []
+    with tempfile.TemporaryDirectory() as directory:
+        artifact_path = os.path.join(directory, "benchmark.engine")
+        build_engine_artifact(KNOWLEDGE_BASE_PATH, artifact_path)
+        for _ in range(runs):
+            import_ns, load_ns = _time_startup("", "compiled")
+            imports.append(import_ns)
+            compiled.append(load_ns)
+            import_ns, load_ns = _time_startup(artifact_path, "artifact")
+            imports.append(import_ns)
+            loaded.append(load_ns)
+    return {
+        "startup_import": summarize(imports, len(imports)),
+        "startup_compile": summarize(compiled, runs),
+        "startup_artifact": summarize(loaded, runs),
+    }
+
+
+def run_benchmarks(corpus_size, seed, warmup, startup_runs=0):
+    corpus = generate_corpus(corpus_size, seed)
+    # Warm up imports, the event loop and CPU caches before measuring
+    warm = corpus[:warmup]
+    bench_analyze_task(warm)
+    bench_recommend(warm, cached=False)
+
+    long_corpus = [description for i, description in enumerate(corpus) if CORPUS_PROFILES[i % len(CORPUS_PROFILES)][0].startswith("long")]
+    results = {
+        "original_scorer": bench_original_scorer(corpus),
+        "engine_scorer": bench_engine_scorer(corpus),
+        "original_scorer_long": bench_original_scorer(long_corpus),
+        "engine_scorer_long": bench_engine_scorer(long_corpus),
+        "analyze_task": bench_analyze_task(corpus),
+        "calculate_score": bench_calculate_score(corpus),
+        "generate_justification": bench_generate_justification(corpus),
+        "recommend_uncached": bench_recommend(corpus, cached=False),
+        "recommend_cached": bench_recommend(corpus, cached=True),
+        "recommend_name_score": bench_recommend(corpus, cached=False, options={"fields": ["name", "score"]}),
+    }
+    if "msgpack" in CODECS:
+        results["recommend_msgpack"] = bench_recommend(corpus, cached=False, headers={"Accept": "application/msgpack"})
+    if startup_runs:
+        results.update(bench_startup(startup_runs))
+    return results
+
+
+def compare(results, baseline, threshold, metric):
+    """Return a list of regressions where metric grew more than threshold over the baseline"""
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference or not reference.get(metric):
+            continue
+        change = stats[metric] / reference[metric] - 1
+        if change > threshold:
+            regressions.append((name, reference[metric], stats[metric], change))
+    return regressions
+
+
+def compare_to_original(results, threshold, metric):
+    """Return the engine benchmarks whose metric exceeds the original scorer's by more than threshold"""
+    regressions = []
+    for name, original in ORIGINAL_SCORER_PAIRS:
+        if name in results and original in results and results[original][metric]:
+            change = results[name][metric] / results[original][metric] - 1
+            if change > threshold:
+                regressions.append((name, results[original][metric], results[name][metric], change))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'benchmark':<26}{'ops':>8}{'ops/s':>12}{'p50 us':>11}{'p95 us':>11}{'p99 us':>11}")
+    for name, stats in results.items():
+        print(
+            f"{name:<26}{stats['operations']:>8}{stats['throughput_per_s']:>12.1f}"
+            f"{stats['p50_us']:>11.2f}{stats['p95_us']:>11.2f}{stats['p99_us']:>11.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation engine and API in-process")
+    parser.add_argument("--corpus-size", type=int, default=2000, help="number of synthetic task descriptions")
+    parser.add_argument("--seed", type=int, default=0, help="corpus random seed")
+    parser.add_argument("--warmup", type=int, default=200, help="descriptions used for warm-up")
+    parser.add_argument("--startup-runs", type=int, default=5,
+                        help="fresh interpreters started per startup benchmark (0 to skip)")
+    parser.add_argument("--save-baseline", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="compare against this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed relative slowdown before failing (default 0.25 = 25%%)")
+    parser.add_argument("--metric", choices=["p50_us", "p95_us", "p99_us"], default="p95_us",
+                        help="latency percentile used for the regression gate")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.corpus_size, args.seed, args.warmup, args.startup_runs)
+    report = {
+        "corpus_size": args.corpus_size,
+        "seed": args.seed,
+        "agents": len(engine.knowledge_base),
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_results(results)
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"✓ Baseline saved to {args.save_baseline}")
+
+    status = 0
+    slower = compare_to_original(results, args.threshold, args.metric)
+    if slower:
+        print(f"\n✗ Engine slower than the original scorer beyond {args.threshold:.0%} ({args.metric}):")
+        for name, original, after, change in slower:
+            print(f"  {name}: {original:.2f} us original → {after:.2f} us (+{change:.0%})")
+        status = 1
+    else:
+        print(f"\n✓ Engine within {args.threshold:.0%} of the original scorer ({args.metric})")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold, args.metric)
+        if regressions:
+            print(f"\n✗ Latency regressions beyond {args.threshold:.0%} ({args.metric}):")
+            for name, before, after, change in regressions:
+                print(f"  {name}: {before:.2f} → {after:.2f} us (+{change:.0%})")
+            return 1
+        print(f"\n✓ No {args.metric} regressions beyond {args.threshold:.0%}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Compile the knowledge base into a prebuilt engine artifact.
+
+The server loads the artifact at startup instead of compiling the knowledge base, as long
+as it was built from the same knowledge base, engine code, Python and NumPy; otherwise it
+logs why and compiles as before. Run this as a build step after editing the knowledge base:
+
+    python build_engine.py                       # knowledge_base.json -> knowledge_base.engine
+    python build_engine.py --output /srv/app.engine
+
+Point ENGINE_ARTIFACT_PATH at the output when it is not next to the knowledge base.
+"""
+import argparse
+import sys
+import time
+
+from main import ENGINE_ARTIFACT_PATH, KNOWLEDGE_BASE_PATH, build_engine_artifact
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a prebuilt engine artifact from the knowledge base")
+    parser.add_argument("--knowledge-base", default=KNOWLEDGE_BASE_PATH, help="knowledge base JSON file")
+    parser.add_argument("--output", default=ENGINE_ARTIFACT_PATH, help="artifact path (default: ENGINE_ARTIFACT_PATH)")
+    args = parser.parse_args()
+    if not args.output:
+        print("✗ No output path: ENGINE_ARTIFACT_PATH is empty and --output was not given", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    size = build_engine_artifact(args.knowledge_base, args.output)
+    print(f"✓ Wrote {args.output} ({size / 1024:.1f} KiB) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
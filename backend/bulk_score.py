@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Offline bulk scoring of task descriptions across all CPU cores.
+
+Reads a JSONL file of TaskRequest records ({"description": ...} per line), scores it in
+chunks on a process pool where every worker builds its own RecommendationEngine, and
+writes one RecommendationResponse (or inline error) per input record, in input order:
+
+    python bulk_score.py tasks.jsonl results.jsonl --workers 8
+
+Only a bounded number of chunks are ever in flight, so memory stays flat no matter how
+large the input is. Use "-" for stdin/stdout.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+_recommend_chunk = None
+
+
+def _init_worker():
+    """Import the app in the worker so each process compiles its own engine"""
+    global _recommend_chunk
+    from main import recommend_chunk
+    _recommend_chunk = recommend_chunk
+
+
+def _score_chunk(job):
+    first_index, lines = job
+    return len(lines), b"".join(_recommend_chunk(lines, first_index, raw=True))
+
+
+def read_chunks(stream, chunk_size):
+    """Yield (first record index, raw JSON lines) chunks, skipping blank lines"""
+    records = (line for line in stream if line.strip())
+    index = 0
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield index, chunk
+        index += len(chunk)
+
+
+def score_file(source, sink, workers, chunk_size, max_in_flight, progress_interval):
+    """Score every record from source into sink; returns the number of records written"""
+    start = time.perf_counter()
+    last_report = start
+    written = 0
+    in_flight = deque()
+    chunks = read_chunks(source, chunk_size)
+
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        exhausted = False
+        while in_flight or not exhausted:
+            # Keep the pool busy without reading further ahead than max_in_flight chunks
+            while not exhausted and len(in_flight) < max_in_flight:
+                job = next(chunks, None)
+                if job is None:
+                    exhausted = True
+                else:
+                    in_flight.append(pool.apply_async(_score_chunk, (job,)))
+            if not in_flight:
+                break
+
+            # Results are written strictly in submission order
+            count, output = in_flight.popleft().get()
+            sink.write(output)
+            written += count
+
+            now = time.perf_counter()
+            if progress_interval and now - last_report >= progress_interval:
+                last_report = now
+                print(f"  {written:,} records, {written / (now - start):,.0f} records/s", file=sys.stderr)
+
+    sink.flush()
+    elapsed = time.perf_counter() - start
+    rate = written / elapsed if elapsed else 0.0
+    print(f"✓ Scored {written:,} records in {elapsed:.1f}s ({rate:,.0f} records/s)", file=sys.stderr)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a JSONL file of tasks with a process pool")
+    parser.add_argument("input", help="JSONL file of TaskRequest records, or - for stdin")
+    parser.add_argument("output", help="JSONL file for the results, or - for stdout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="records per worker task")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="chunks queued or running at once (default: 2 per worker)")
+    parser.add_argument("--progress", type=float, default=5.0, help="seconds between progress reports, 0 to disable")
+    args = parser.parse_args()
+
+    max_in_flight = args.max_in_flight or 2 * args.workers
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    sink = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        score_file(source, sink, args.workers, args.chunk_size, max_in_flight, args.progress)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout.buffer:
+            sink.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Opt-in traffic capture: records request bodies and arrival times to rotating segment files.
+
+Requests only enqueue (arrival time, path, body, Accept header); a background thread encodes and appends
+them in batches, so recording never waits on the disk. When the queue is full, records are
+dropped and counted rather than slowing requests down. Segments are JSONL files named
+capture-<start ms>-<pid>-<seq>.jsonl, so several workers can share one directory.
+"""
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+class TrafficRecorder:
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, max_segments: int = 16,
+                 batch_size: int = 256, max_pending: int = 65536, on_record=None, on_drop=None):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.batch_size = batch_size
+        # Optional hooks, called with the number of records written or dropped
+        self.on_record = on_record
+        self.on_drop = on_drop
+        self._queue = queue.Queue(max_pending)
+        self._prefix = None
+        self._segments: List[str] = []
+        self._sequence = 0
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            # Named at start rather than construction so forked workers each get their own pid
+            self._prefix = f"capture-{int(time.time() * 1000)}-{os.getpid()}"
+            self._thread = threading.Thread(target=self._run, name="traffic-recorder", daemon=True)
+            self._thread.start()
+
+    def record(self, arrival: float, path: str, body: bytes, accept: Optional[str] = None):
+        """Queue one request for writing; never blocks"""
+        try:
+            self._queue.put_nowait((arrival, path, body, accept))
+        except queue.Full:
+            if self.on_drop is not None:
+                self.on_drop(1)
+
+    def close(self):
+        """Write everything queued so far and stop the writer thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _open_segment(self):
+        path = os.path.join(self.directory, f"{self._prefix}-{self._sequence:05d}.jsonl")
+        self._sequence += 1
+        self._segments.append(path)
+        self._file = open(path, "ab")
+        # Only this recorder's own segments are pruned; other workers manage theirs
+        while len(self._segments) > self.max_segments:
+            try:
+                os.remove(self._segments.pop(0))
+            except OSError:
+                pass
+
+    def _write(self, batch):
+        if self._file is None:
+            self._open_segment()
+        lines = [
+            json.dumps({"ts": arrival, "path": path, "body": body.decode("utf-8", "replace"), "accept": accept}) + "\n"
+            for arrival, path, body, accept in batch
+        ]
+        self._file.write("".join(lines).encode("utf-8"))
+        self._file.flush()
+        if self.on_record is not None:
+            self.on_record(len(batch))
+        if self._file.tell() >= self.segment_bytes:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._queue.get()
+            # Drain whatever else is already waiting, up to one batch, into a single write
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            stopping = item is None
+            if batch:
+                self._write(batch)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CaptureMiddleware:
+    """ASGI middleware that hands request bodies for the captured paths to a TrafficRecorder"""
+
+    def __init__(self, app, recorder: TrafficRecorder, paths: Iterable[str] = ("/recommend",)):
+        self.app = app
+        self.recorder = recorder
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        arrival = time.time()
+        chunks = []
+        # Kept so replay asks for the same response encoding (e.g. MessagePack) as the client did
+        accept = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"accept"), None)
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self.recorder.record(arrival, scope["path"], b"".join(chunks), accept)
+            return message
+
+        await self.app(scope, receive_wrapper, send)
+
+
+def read_capture(paths: Iterable[str]) -> List[Tuple[float, str, bytes, Optional[str]]]:
+    """Load (arrival time, path, body, Accept header) records from segment files or directories, oldest first"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "capture-*.jsonl"))))
+        else:
+            files.append(path)
+    records = []
+    for line in _lines(files):
+        entry = json.loads(line)
+        records.append((entry["ts"], entry["path"], entry["body"].encode("utf-8"), entry.get("accept")))
+    records.sort(key=lambda record: record[0])
+    return records
+
+
+def _lines(files: List[str]) -> Iterator[str]:
+    for name in files:
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                # A crash can leave a torn last line; skip it rather than fail the replay
+                if line.endswith("\n") and line.strip():
+                    yield line
@@ -0,0 +1,184 @@
+"""
+Runs CPU-bound scoring off the event loop, with bounded concurrency and load shedding.
+
+Jobs beyond the concurrency limit wait in a FIFO admission queue. When the queue is full,
+or a job waits longer than the queue timeout, the job is rejected with Overloaded so the
+caller can answer 503 instead of letting latency grow without bound.
+
+Process workers are started with "spawn" rather than fork: the server already runs threads
+(watchers, recorders, pools) and a lock held by one of them at fork time would stay locked
+forever in the child.
+"""
+import asyncio
+import collections
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+def _run_and_collect(fn: Callable, collect: Callable, *args):
+    """Run a job in a process worker and return its result with whatever collect() reports afterwards"""
+    return fn(*args), collect()
+
+
+class Overloaded(Exception):
+    """Raised when a scoring job cannot be admitted"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Scoring capacity exhausted ({reason})")
+        self.reason = reason
+
+
+class ScoringExecutor:
+    """Admission-controlled executor for scoring jobs.
+
+    mode "inline" runs jobs directly on the event loop (no isolation, no queueing);
+    "thread" and "process" run them on a pool of `workers`, with at most `workers` jobs
+    running and at most `max_queue` waiting for up to `queue_timeout` seconds.
+
+    In process mode, `collect` (if given) runs in the worker after every job and its return
+    value is handed to `on_collect` in this process, e.g. to merge metrics recorded by the job.
+    Jobs that work on this process's in-memory state use run_local(), which shares the same
+    admission control but always runs on a thread.
+    """
+
+    def __init__(self, mode: str = "thread", workers: Optional[int] = None, max_queue: int = 64,
+                 queue_timeout: float = 5.0, initializer: Optional[Callable] = None, on_wait=None, on_reject=None,
+                 collect: Optional[Callable] = None, on_collect=None, start_method: str = "spawn"):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode {mode!r}; expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.initializer = initializer
+        # Optional hooks: on_wait(seconds) after admission, on_reject(reason) when shedding
+        self.on_wait = on_wait
+        self.on_reject = on_reject
+        self.collect = collect
+        self.on_collect = on_collect
+        self.start_method = start_method
+        self.running = 0
+        self._waiters = collections.deque()
+        self._pool: Optional[Executor] = None
+        self._local_pool: Optional[Executor] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=self.initializer,
+                )
+            else:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="scoring")
+        return self._pool
+
+    def _get_local_pool(self) -> Executor:
+        if self.mode != "process":
+            return self._get_pool()
+        if self._local_pool is None:
+            self._local_pool = ThreadPoolExecutor(self.workers, thread_name_prefix="scoring-local")
+        return self._local_pool
+
+    def _reject(self, reason: str):
+        if self.on_reject is not None:
+            self.on_reject(reason)
+        raise Overloaded(reason)
+
+    async def _acquire(self):
+        if self.running < self.workers and not self._waiters:
+            self.running += 1
+            return
+        if self.queue_depth >= self.max_queue:
+            self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # The releasing job hands its slot straight to us, so running is not incremented here
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot arrived just as we timed out; pass it on rather than leak it
+                self._release()
+            self._reject("queue_timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+        finally:
+            if waiter in self._waiters and waiter.done():
+                self._waiters.remove(waiter)
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+    async def _admit(self):
+        start = time.perf_counter()
+        await self._acquire()
+        if self.on_wait is not None:
+            self.on_wait(time.perf_counter() - start)
+
+    def _release_from_worker(self, loop: asyncio.AbstractEventLoop):
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # The loop is closed, so nothing is left waiting for the slot
+            pass
+
+    def _submit(self, get_pool: Callable[[], Executor], fn: Callable, *args) -> asyncio.Future:
+        """Start an admitted job; its slot is released when the job finishes, not when its caller stops waiting.
+        
+        Cancelling the caller (e.g. a disconnected client) cannot stop a job already running on a
+        worker, so releasing on cancellation would admit the next job while the worker is still busy.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            future = get_pool().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release_from_worker(loop))
+        return asyncio.wrap_future(future, loop=loop)
+
+    async def run(self, fn: Callable, *args):
+        """Run fn(*args) under admission control; raises Overloaded when shedding load"""
+        if self.mode == "inline":
+            return fn(*args)
+
+        await self._admit()
+        if self.mode != "process" or self.collect is None:
+            return await self._submit(self._get_pool, fn, *args)
+        result, collected = await self._submit(self._get_pool, _run_and_collect, fn, self.collect, *args)
+        if self.on_collect is not None:
+            self.on_collect(collected)
+        return result
+
+    async def run_local(self, fn: Callable, *args):
+        """Like run(), but in this process even in process mode, for jobs that mutate local state"""
+        if self.mode == "inline":
+            return fn(*args)
+
+        await self._admit()
+        return await self._submit(self._get_local_pool, fn, *args)
+
+    def shutdown(self):
+        for pool in (self._pool, self._local_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._local_pool = None
@@ -1,11 +1,70 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Body, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, ValidationError, create_model
+from typing import Any, List, Dict, Iterable, Literal, NamedTuple, Optional, Tuple, Union
+from collections import OrderedDict
+import numpy as np
+import base64
+import functools
+import gzip
+import hashlib
+import os
 import re
+import sys
 import json
+import logging
+import math
+import threading
+import asyncio
+import zlib
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="AI Coding Agent Recommendation System", version="1.0.0")
+from artifact import ArtifactError, read_artifact, write_artifact
+from capture import CaptureMiddleware, TrafficRecorder
+from executor import Overloaded, ScoringExecutor
+from metrics import (
+    PROMETHEUS_CONTENT_TYPE, SIZE_BUCKETS, MetricsMiddleware, Registry, SamplingProfiler,
+)
+
+try:
+    import brotli
+except ImportError:  # Optional: /agents is served gzip-only without it
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:  # Optional: large keyword sets are matched with one `in` check per pattern without it
+    ahocorasick = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: /recommend answers Accept: application/msgpack with 406 without it
+    msgpack = None
+
+logger = logging.getLogger("recommendation")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the engine before taking traffic rather than on the first request
+    engine.ensure_loaded()
+    # Pick up knowledge base edits without a restart
+    engine.start_watching(KNOWLEDGE_BASE_RELOAD_INTERVAL)
+    if recorder is not None:
+        recorder.start()
+    yield
+    engine.stop_watching()
+    scoring.shutdown()
+    if recorder is not None:
+        recorder.close()
+
+app = FastAPI(title="AI Coding Agent Recommendation System", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -16,11 +75,123 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metrics
+METRICS = Registry()
+REQUESTS_TOTAL = METRICS.counter(
+    "http_requests_total", "HTTP requests by method, route and status code", ["method", "route", "status"]
+)
+REQUEST_SECONDS = METRICS.histogram("http_request_duration_seconds", "HTTP request latency by route", ["route"])
+STAGE_SECONDS = METRICS.histogram(
+    "recommendation_stage_seconds", "Time spent in each recommendation pipeline stage", ["stage"]
+)
+DESCRIPTION_CHARS = METRICS.histogram(
+    "recommendation_description_chars", "Length of task descriptions in characters", buckets=SIZE_BUCKETS
+)
+BATCH_TASKS = METRICS.histogram("recommendation_batch_tasks", "Number of tasks per batch request", buckets=SIZE_BUCKETS)
+ERRORS_TOTAL = METRICS.counter(
+    "recommendation_errors_total", "Failed recommendations by endpoint and exception type", ["endpoint", "type"]
+)
+METRICS.gauge("knowledge_base_version", "Version of the engine snapshot being served", lambda: engine.snapshot.version)
+# Latest response cache stats reported by each scoring process worker, by pid
+WORKER_CACHE_STATS: Dict[int, Dict[str, int]] = {}
+for _stat in ("size", "hits", "misses", "evictions"):
+    METRICS.gauge(
+        f"response_cache_{_stat}",
+        f"Response cache {_stat} for the current engine snapshot, summed over scoring process workers",
+        lambda stat=_stat: engine.snapshot.response_cache.stats()[stat]
+        + sum(stats[stat] for stats in list(WORKER_CACHE_STATS.values())),
+    )
+app.add_middleware(MetricsMiddleware, requests_total=REQUESTS_TOTAL, request_seconds=REQUEST_SECONDS)
+
+# Opt-in traffic capture for replay.py: set CAPTURE_DIR to record request bodies and arrival times
+CAPTURE_DIR = os.environ.get("CAPTURE_DIR", "")
+CAPTURE_PATHS = [path for path in os.environ.get("CAPTURE_PATHS", "/recommend").split(",") if path]
+CAPTURE_SEGMENT_MB = int(os.environ.get("CAPTURE_SEGMENT_MB", "64"))
+CAPTURE_MAX_SEGMENTS = int(os.environ.get("CAPTURE_MAX_SEGMENTS", "16"))
+
+CAPTURED_TOTAL = METRICS.counter("capture_records_total", "Requests written to capture segments")
+CAPTURE_DROPPED_TOTAL = METRICS.counter("capture_dropped_total", "Requests not captured because the writer fell behind")
+recorder = None
+if CAPTURE_DIR:
+    recorder = TrafficRecorder(
+        CAPTURE_DIR,
+        segment_bytes=CAPTURE_SEGMENT_MB * 1024 * 1024,
+        max_segments=CAPTURE_MAX_SEGMENTS,
+        on_record=lambda count: CAPTURED_TOTAL.inc(amount=count),
+        on_drop=lambda count: CAPTURE_DROPPED_TOTAL.inc(amount=count),
+    )
+    app.add_middleware(CaptureMiddleware, recorder=recorder, paths=CAPTURE_PATHS)
+
+# Opt-in sampling profiler behind /debug/profile
+ENABLE_PROFILER = os.environ.get("ENABLE_PROFILER", "0") == "1"
+PROFILER_MAX_SECONDS = 60.0
+profiler = SamplingProfiler()
+
+# Scoring execution: "inline" runs on the event loop, "thread"/"process" use a bounded pool
+SCORING_EXECUTOR = os.environ.get("SCORING_EXECUTOR", "thread")
+SCORING_WORKERS = int(os.environ.get("SCORING_WORKERS", "0")) or None
+SCORING_QUEUE_DEPTH = int(os.environ.get("SCORING_QUEUE_DEPTH", "64"))
+SCORING_QUEUE_TIMEOUT = float(os.environ.get("SCORING_QUEUE_TIMEOUT", "5.0"))
+SCORING_RETRY_AFTER = os.environ.get("SCORING_RETRY_AFTER", "1")
+
+QUEUE_WAIT_SECONDS = METRICS.histogram("scoring_queue_wait_seconds", "Time scoring jobs waited for admission")
+REJECTED_TOTAL = METRICS.counter("scoring_rejected_total", "Scoring jobs shed with a 503, by reason", ["reason"])
+
+def _init_scoring_process():
+    # Process workers have their own engine; keep it in sync with the knowledge base file
+    engine.ensure_loaded()
+    engine.start_watching(KNOWLEDGE_BASE_RELOAD_INTERVAL)
+
+def _collect_worker_metrics():
+    """Runs in a scoring process after each job: the metrics it recorded, and its response cache stats"""
+    return os.getpid(), METRICS.drain(), engine.snapshot.response_cache.stats()
+
+def _merge_worker_metrics(collected):
+    pid, drained, cache_stats = collected
+    METRICS.merge(drained)
+    WORKER_CACHE_STATS[pid] = cache_stats
+
+scoring = ScoringExecutor(
+    SCORING_EXECUTOR,
+    workers=SCORING_WORKERS,
+    max_queue=SCORING_QUEUE_DEPTH,
+    queue_timeout=SCORING_QUEUE_TIMEOUT,
+    initializer=_init_scoring_process,
+    on_wait=QUEUE_WAIT_SECONDS.observe,
+    on_reject=REJECTED_TOTAL.inc,
+    # Stage timings, description lengths and errors are recorded in the worker; ship them back
+    collect=_collect_worker_metrics,
+    on_collect=_merge_worker_metrics,
+)
+METRICS.gauge("scoring_queue_depth", "Scoring jobs waiting for admission", lambda: scoring.queue_depth)
+METRICS.gauge("scoring_jobs_running", "Scoring jobs currently running", lambda: scoring.running)
+
 # Request/Response Models
+# Largest page a client can ask for
+MAX_TOP_K = 100
+# Far past any knowledge base, but small enough to stay an exact int through NumPy and JSON
+MAX_OFFSET = 1_000_000
+
+# Fields of an AgentRecommendation, in response order
+RecommendationField = Literal["name", "score", "justification", "strengths", "use_cases", "pricing", "tools"]
+
+class AgentFilters(BaseModel):
+    """Constraints an agent must meet to be scored at all; ideal_for requires every listed tag"""
+    complexity: Optional[str] = None
+    project_type: Optional[str] = None
+    pricing_tier: Optional[str] = None
+    ideal_for: List[str] = []
+
 class TaskRequest(BaseModel):
     description: str
     complexity: Optional[str] = None
     project_type: Optional[str] = None
+    top_k: int = Field(3, ge=1, le=MAX_TOP_K)
+    offset: int = Field(0, ge=0, le=MAX_OFFSET)
+    cursor: Optional[str] = None  # next_cursor from a previous page; takes precedence over offset
+    filters: Optional[AgentFilters] = None
+    # Only return these recommendation fields; fields left out (justification above all) are not computed
+    fields: Optional[List[RecommendationField]] = Field(None, min_length=1)
     
 class AgentRecommendation(BaseModel):
     name: str
@@ -31,150 +202,938 @@ class AgentRecommendation(BaseModel):
     pricing: str
     tools: List[str]
 
+class Page(BaseModel):
+    offset: int
+    top_k: int
+    total: int  # agents that passed the filters
+    next_cursor: Optional[str] = None
+
 class RecommendationResponse(BaseModel):
     recommendations: List[AgentRecommendation]
     task_analysis: Dict[str, str]
+    page: Optional[Page] = None  # only present when the request set top_k, offset, cursor or filters
+
+# The response to a request that set `fields`: every recommendation field becomes optional
+ProjectedRecommendation = create_model(
+    "ProjectedRecommendation",
+    __doc__="An AgentRecommendation cut down to the requested fields; the others are left out, not null",
+    **{name: (field.annotation, None) for name, field in AgentRecommendation.model_fields.items()},
+)
+
+class ProjectedRecommendationResponse(RecommendationResponse):
+    recommendations: List[ProjectedRecommendation]
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["offset"]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor("Invalid cursor") from None
+    # bool is an int subclass, so {"offset": true} would otherwise pass as 1
+    if type(offset) is not int or not 0 <= offset <= MAX_OFFSET:
+        raise InvalidCursor("Invalid cursor")
+    return offset
+
+class PageQuery(NamedTuple):
+    """The result window and candidate filters of a request that asked for more than the default top 3"""
+    top_k: int
+    offset: int
+    filters: tuple  # (complexity, project_type, pricing_tier, ideal_for tags)
+
+PAGE_FIELDS = frozenset(["top_k", "offset", "cursor", "filters"])
+
+def page_query(task: TaskRequest) -> Optional[PageQuery]:
+    """The task's PageQuery, or None for a plain request so its response stays exactly as before"""
+    if task.model_fields_set.isdisjoint(PAGE_FIELDS):
+        return None
+    offset = decode_cursor(task.cursor) if task.cursor else task.offset
+    filters = task.filters or AgentFilters()
+    return PageQuery(
+        task.top_k,
+        offset,
+        (filters.complexity, filters.project_type, filters.pricing_tier, tuple(filters.ideal_for)),
+    )
+
+RECOMMENDATION_FIELDS = tuple(AgentRecommendation.model_fields)
+
+def projection(task: TaskRequest) -> Optional[tuple]:
+    """The requested recommendation fields in response order, or None for all of them"""
+    if task.fields is None:
+        return None
+    fields = tuple(field for field in RECOMMENDATION_FIELDS if field in task.fields)
+    return None if fields == RECOMMENDATION_FIELDS else fields
 
 # Agent Knowledge Base
-AGENT_KNOWLEDGE_BASE = {
-    "Copilot": {
-        "capabilities": [
-            "Code completion", "Chat assistance", "Code review", "Pull request summaries",
-            "Multi-language support", "IDE integration", "GitHub integration", "Agent mode",
-            "Coding agent for autonomous development", "Next edit suggestions"
-        ],
-        "strengths": [
-            "Excellent code completion accuracy",
-            "Deep GitHub integration",
-            "Multiple AI model support (Claude 3.5 Sonnet, GPT-4.1, Gemini 2.0)",
-            "Autonomous coding agent capabilities",
-            "Code review and security scanning",
-            "Wide language support",
-            "Enterprise-grade security and compliance"
-        ],
-        "tools": [
-            "Code completion", "Copilot Chat", "Copilot coding agent", "Code review",
-            "Pull request summaries", "Copilot Extensions", "GitHub Models",
-            "Copilot Edits", "Next edit suggestions", "Windows Terminal integration"
-        ],
-        "use_cases": [
-            "Code completion and suggestions",
-            "Code review and security analysis", 
-            "Autonomous issue resolution",
-            "Multi-file code changes",
-            "Learning new languages and frameworks",
-            "Debugging and error fixing",
-            "Enterprise development workflows"
-        ],
-        "pricing": "Free (limited), Pro ($10/month), Pro+ ($39/month), Business/Enterprise",
-        "ideal_for": ["enterprise", "collaborative", "github_workflow", "security", "code_review"],
-        "complexity_handling": ["simple", "medium", "complex"],
-        "project_types": ["web_app", "api", "mobile", "desktop", "enterprise", "open_source"]
-    },
-    "Cursor": {
-        "capabilities": [
-            "AI-powered code editor", "Multi-file editing", "Codebase understanding",
-            "Chat with codebase", "Composer for complex changes", "Fast apply edits",
-            "Symbol navigation", "Code generation", "Debugging assistance"
-        ],
-        "strengths": [
-            "Deep codebase understanding and context",
-            "Excellent multi-file editing capabilities",
-            "Fast and intuitive code editor",
-            "Composer for complex multi-step changes",
-            "Smart symbol navigation and search",
-            "Privacy-focused with local processing options",
-            "Advanced prompt engineering capabilities"
-        ],
-        "tools": [
-            "AI Editor", "Composer", "Chat interface", "Symbol search",
-            "Multi-file editing", "Codebase indexing", "Smart apply",
-            "Debug mode", "Terminal integration", "File tree navigation"
-        ],
-        "use_cases": [
-            "Large codebase navigation and understanding",
-            "Complex multi-file refactoring",
-            "Code generation and completion",
-            "Debugging and problem solving",
-            "Learning and exploring new codebases",
-            "Privacy-sensitive development",
-            "Advanced prompt-based coding"
-        ],
-        "pricing": "Free tier available, Pro subscription for advanced features",
-        "ideal_for": ["large_codebase", "refactoring", "exploration", "privacy", "advanced_prompting"],
-        "complexity_handling": ["medium", "complex", "very_complex"],
-        "project_types": ["web_app", "api", "desktop", "enterprise", "research"]
-    },
-    "Replit": {
-        "capabilities": [
-            "Natural language to app generation", "Full-stack development", "Instant deployment",
-            "Collaborative coding", "Multi-language support", "Built-in database",
-            "Authentication system", "Agent-based development"
-        ],
-        "strengths": [
-            "Fastest prototyping and deployment",
-            "No setup required - cloud-based",
-            "Natural language app generation",
-            "Built-in database and authentication",
-            "Excellent for beginners and rapid prototyping",
-            "Strong collaboration features",
-            "Integrated deployment pipeline"
-        ],
-        "tools": [
-            "Replit Agent", "Cloud IDE", "Built-in database", "Replit Auth",
-            "Deployment system", "Collaboration tools", "Package manager",
-            "Version control", "Secret management", "Custom domains"
-        ],
-        "use_cases": [
-            "Rapid prototyping and MVP development",
-            "Educational projects and learning",
-            "Quick demos and proof of concepts",
-            "Collaborative coding sessions",
-            "No-code/low-code app development",
-            "Instant web app deployment",
-            "Hackathons and competitions"
-        ],
-        "pricing": "Free tier with limitations, paid plans for advanced features",
-        "ideal_for": ["prototyping", "education", "beginners", "rapid_deployment", "collaboration"],
-        "complexity_handling": ["simple", "medium"],
-        "project_types": ["web_app", "prototype", "educational", "mvp", "demo"]
+KNOWLEDGE_BASE_PATH = os.environ.get(
+    "KNOWLEDGE_BASE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base.json")
+)
+# Seconds between checks of the knowledge base file for changes; 0 disables hot reload
+KNOWLEDGE_BASE_RELOAD_INTERVAL = float(os.environ.get("KNOWLEDGE_BASE_RELOAD_INTERVAL", "2.0"))
+# Prebuilt engine written by build_engine.py; used instead of compiling when it matches the
+# knowledge base and this code. Set to an empty string to always compile.
+ENGINE_ARTIFACT_PATH = os.environ.get("ENGINE_ARTIFACT_PATH", os.path.splitext(KNOWLEDGE_BASE_PATH)[0] + ".engine")
+
+def load_knowledge_base(path: str):
+    """Read the agent knowledge base, keyword weights and scoring settings from a JSON file"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    agents = data["agents"]
+    keyword_weights = data["keyword_weights"]
+    scoring = data.get("scoring", {})
+    for agent_name, agent_data in agents.items():
+        for field in ("strengths", "use_cases", "tools", "pricing", "complexity_handling"):
+            if field not in agent_data:
+                raise ValueError(f"Agent {agent_name!r} in {path} is missing {field!r}")
+    return agents, keyword_weights, scoring
+
+def _file_sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def artifact_metadata(path: str) -> Dict[str, str]:
+    """Everything a compiled snapshot depends on: the knowledge base, the engine code and the runtime"""
+    return {
+        "knowledge_base_sha256": _file_sha256(path),
+        "engine_sha256": _file_sha256(__file__),
+        "python": "%d.%d" % sys.version_info[:2],
+        "numpy": np.__version__,
+        "codecs": ",".join(CODECS),
     }
+
+# Text Index
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "with", "my", "our", "i", "we", "you",
+])
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class BM25Index:
+    """Inverted index over agent text with BM25 weights, stored as a sparse term x agent matrix.
+    
+    Row t of the matrix (indices/data[indptr[t]:indptr[t + 1]]) is the posting list of term t,
+    so a query only touches the postings of its own terms.
+    """
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.2, b: float = 0.75, step: float = 0.01):
+        self.size = len(documents)
+        self.step = step
+        lengths = [len(tokens) for tokens in documents]
+        average_length = (sum(lengths) / self.size) if self.size and sum(lengths) else 1.0
+        
+        postings = {}
+        for doc, tokens in enumerate(documents):
+            for token in tokens:
+                term_postings = postings.setdefault(token, {})
+                term_postings[doc] = term_postings.get(doc, 0) + 1
+        
+        self.vocabulary = {}
+        indptr, indices, data = [0], [], []
+        for term, term_postings in postings.items():
+            self.vocabulary[term] = len(self.vocabulary)
+            idf = math.log(1 + (self.size - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+            for doc, frequency in sorted(term_postings.items()):
+                length_norm = k1 * (1 - b + b * lengths[doc] / average_length)
+                indices.append(doc)
+                data.append(idf * frequency * (k1 + 1) / (frequency + length_norm))
+            indptr.append(len(indices))
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int64)
+        self.data = np.array(data, dtype=np.float64)
+
+    def query_terms(self, text: str) -> frozenset:
+        """Distinct indexed terms in text; everything else cannot contribute to a score"""
+        return frozenset(token for token in TOKEN_PATTERN.findall(text) if token in self.vocabulary)
+
+    def score(self, terms: frozenset) -> np.ndarray:
+        """BM25 score of every document for a query, touching only the query terms' postings"""
+        scores = np.zeros(self.size)
+        # Sorted so the float sums do not depend on set iteration order
+        for term in sorted(terms):
+            row = self.vocabulary[term]
+            start, end = self.indptr[row], self.indptr[row + 1]
+            scores[self.indices[start:end]] += self.data[start:end]
+        return scores
+
+    def query(self, terms: frozenset) -> Tuple[Tuple[int, int], ...]:
+        """(agent, relevance in multiples of step) for every agent with a nonzero level, given query_terms().
+        
+        Relevance is normalized so the best agent gets 1, then quantized like SemanticIndex.query,
+        so different wordings that rank the agents alike share one cache key.
+        """
+        if not terms or not self.size:
+            return ()
+        scores = self.score(terms)
+        best = scores.max()
+        if best <= 0:
+            return ()
+        levels = np.rint(scores / best / self.step).astype(np.int64)
+        agents = np.flatnonzero(levels)
+        return tuple(zip(agents.tolist(), levels[agents].tolist()))
+
+# Semantic Index
+@functools.lru_cache(maxsize=65536)
+def _ngram_features(token: str, dimensions: int, min_n: int, max_n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Signed hashed character n-grams of one word, padded with boundary markers, as (buckets, signs) arrays"""
+    padded = f"<{token}>"
+    buckets, signs = [], []
+    for n in range(min_n, max_n + 1):
+        for start in range(len(padded) - n + 1):
+            # crc32 rather than hash(): buckets must agree across processes and prebuilt artifacts
+            digest = zlib.crc32(padded[start:start + n].encode("utf-8"))
+            buckets.append((digest >> 1) % dimensions)
+            signs.append(1 if digest & 1 else -1)
+    features = np.array(buckets, dtype=np.int64), np.array(signs, dtype=np.int64)
+    # Shared through the cache, so make sure nobody modifies them in place
+    for array in features:
+        array.setflags(write=False)
+    return features
+
+class SemanticIndex:
+    """Hashed character n-gram vectors of agent phrases, with a random-projection LSH index.
+    
+    Each phrase (a use case, capability or strength) is a unit vector of signed n-gram counts,
+    stored as a sparse row matrix, so related word forms ("prototype", "prototyping") and
+    configured synonyms overlap while a word inside another ("app" in "happy") barely does.
+    A query's similarity to an agent is its best cosine over the agent's phrases.
+    
+    Each LSH table keys every phrase by the signs of `bits` random projections, kept sorted so
+    a lookup is a binary search. A query probes its own bucket and every bucket one bit away
+    in each table, and only those candidate phrases are compared exactly. Catalogs with fewer
+    than `lsh_min_rows` phrases are compared exhaustively instead.
+    """
+
+    def __init__(self, phrases: List[List[str]], dimensions: int = 4096, ngram_range=(3, 5),
+                 synonyms: Optional[Dict[str, List[str]]] = None, min_similarity: float = 0.2,
+                 tables: int = 16, bits: Optional[int] = None, lsh_min_rows: int = 512, seed: int = 0,
+                 step: float = 0.001, max_chars: int = 2000):
+        self.dimensions = dimensions
+        self.min_n, self.max_n = ngram_range
+        self.synonyms = {word: tuple(expansions) for word, expansions in (synonyms or {}).items()}
+        self.min_similarity = min_similarity
+        self.step = step
+        self.max_chars = max_chars
+        self.size = len(phrases)
+        
+        rows, indptr, indices, data = [], [0], [], []
+        for agent, agent_phrases in enumerate(phrases):
+            for phrase in dict.fromkeys(agent_phrases):
+                counts = self.vectorize(tokenize(phrase))
+                buckets = np.flatnonzero(counts)
+                if not buckets.size:
+                    continue
+                values = counts[buckets].astype(np.float64)
+                rows.append(agent)
+                indices.append(buckets)
+                data.append(values / np.linalg.norm(values))
+                indptr.append(indptr[-1] + buckets.size)
+        self.row_agents = np.array(rows, dtype=np.int64)
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.concatenate(indices) if indices else np.empty(0, dtype=np.int64)
+        self.data = np.concatenate(data) if data else np.empty(0)
+        
+        self.lsh = len(rows) >= lsh_min_rows
+        if self.lsh:
+            self.bits = bits or max(4, min(20, int(math.log2(len(rows))) - 3))
+            rng = np.random.default_rng(seed)
+            self.planes = rng.standard_normal((tables * self.bits, dimensions)).astype(np.float32)
+            keys = self._keys(self._project_rows())
+            # Per table: phrase keys in ascending order and the phrase rows they belong to
+            self.table_rows = np.argsort(keys, axis=1, kind="stable")
+            self.table_keys = np.take_along_axis(keys, self.table_rows, axis=1)
+
+    def vectorize(self, tokens: Iterable[str]) -> np.ndarray:
+        """Signed n-gram counts per bucket (a dense integer vector) of a token sequence, synonyms included"""
+        dimensions, min_n, max_n = self.dimensions, self.min_n, self.max_n
+        words = list(tokens)
+        words.extend(synonym for token in words for synonym in self.synonyms.get(token, ()))
+        if not words:
+            return np.zeros(dimensions, dtype=np.int64)
+        features = [_ngram_features(word, dimensions, min_n, max_n) for word in words]
+        buckets = np.concatenate([word_buckets for word_buckets, _ in features])
+        signs = np.concatenate([word_signs for _, word_signs in features])
+        return np.bincount(buckets, signs, minlength=dimensions).astype(np.int64)
+
+    def _project_rows(self, chunk: int = 1024) -> np.ndarray:
+        """Projection of every phrase onto the LSH planes, densifying a chunk of rows at a time"""
+        planes = np.ascontiguousarray(self.planes.T)
+        projections = np.empty((self.indptr.size - 1, planes.shape[1]), dtype=np.float32)
+        for first in range(0, projections.shape[0], chunk):
+            last = min(first + chunk, projections.shape[0])
+            dense = np.zeros((last - first, self.dimensions), dtype=np.float32)
+            start, end = self.indptr[first], self.indptr[last]
+            row_of = np.repeat(np.arange(last - first), np.diff(self.indptr[first:last + 1]))
+            dense[row_of, self.indices[start:end]] = self.data[start:end]
+            projections[first:last] = dense @ planes
+        return projections
+
+    def _keys(self, projections: np.ndarray) -> np.ndarray:
+        """Bucket key of each row in each table (shape tables x rows) from the projection signs"""
+        signs = (projections > 0).reshape(len(projections), -1, self.bits)
+        return (signs @ (1 << np.arange(self.bits, dtype=np.int64))).T
+
+    def candidates(self, buckets: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Rows in the LSH buckets probed for a query vector"""
+        keys = self._keys((self.planes[:, buckets] @ values)[None, :])[:, 0]
+        probes = keys[:, None] ^ np.concatenate(([0], 1 << np.arange(self.bits, dtype=np.int64)))
+        found = []
+        for table, table_probes in enumerate(probes):
+            table_keys = self.table_keys[table]
+            starts = np.searchsorted(table_keys, table_probes, "left")
+            ends = np.searchsorted(table_keys, table_probes, "right")
+            found.extend(self.table_rows[table, start:end] for start, end in zip(starts, ends) if end > start)
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+    def query(self, counts: np.ndarray) -> Tuple[Tuple[int, int], ...]:
+        """(agent, similarity in multiples of step) for every agent at or above min_similarity, given vectorize() counts.
+        
+        Similarities are quantized so they can be part of a cache key and compare exactly.
+        """
+        buckets = np.flatnonzero(counts)
+        if not buckets.size or not self.size:
+            return ()
+        values = counts[buckets].astype(np.float64)
+        values /= np.linalg.norm(values)
+        query = np.zeros(self.dimensions)
+        query[buckets] = values
+        if self.lsh:
+            rows = self.candidates(buckets, values)
+            if not rows.size:
+                return ()
+            # Dot each candidate's sparse row with the dense query
+            starts = self.indptr[rows]
+            lengths = self.indptr[rows + 1] - starts
+            offsets = np.cumsum(lengths) - lengths
+            positions = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+            similarities = np.add.reduceat(self.data[positions] * query[self.indices[positions]], offsets)
+            row_agents = self.row_agents[rows]
+        else:
+            if not self.data.size:
+                return ()
+            similarities = np.add.reduceat(self.data * query[self.indices], self.indptr[:-1])
+            row_agents = self.row_agents
+        
+        best = np.zeros(self.size)
+        np.maximum.at(best, row_agents, similarities)
+        levels = np.rint(best / self.step).astype(np.int64)
+        agents = np.flatnonzero((best >= self.min_similarity) & (levels > 0))
+        return tuple(zip(agents.tolist(), levels[agents].tolist()))
+
+# Interned Attributes
+class Vocabulary:
+    """Interns string values as bit positions so a set of values becomes one integer bitmask"""
+
+    def __init__(self, values=()):
+        self.ids: Dict[str, int] = {}
+        self._values: List[str] = []
+        for value in values:
+            self.add(value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, value) -> bool:
+        return value in self.ids
+
+    def add(self, value: str) -> int:
+        """Intern value and return its ID"""
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self._values)
+            self._values.append(value)
+        return value_id
+
+    def bit(self, value: str) -> int:
+        """Single-bit mask for value, 0 if it was never interned"""
+        value_id = self.ids.get(value)
+        return 0 if value_id is None else 1 << value_id
+
+    def mask(self, values) -> int:
+        mask = 0
+        for value in values:
+            mask |= self.bit(value)
+        return mask
+
+    def values(self, mask: int) -> List[str]:
+        """The interned values whose bits are set in mask, in ID order"""
+        values = []
+        while mask:
+            low = mask & -mask
+            values.append(self._values[low.bit_length() - 1])
+            mask ^= low
+        return values
+
+class AgentAttributes:
+    """One agent's memberships as bitmasks over the snapshot's attribute vocabularies"""
+    __slots__ = ("index", "complexity", "project_types", "ideal_for", "ideal_ids")
+
+    def __init__(self, index: int, complexity: int, project_types: int, ideal_for: int, ideal_ids: tuple):
+        self.index = index
+        self.complexity = complexity
+        self.project_types = project_types
+        self.ideal_for = ideal_for
+        # ideal_for in knowledge base order, repeats included, so scoring adds the same terms as before
+        self.ideal_ids = ideal_ids
+
+class TaskProfile:
+    """A task analysis encoded against the same vocabularies, so matching an agent is a bitwise AND"""
+    __slots__ = ("complexity", "project_type", "ideal_for")
+
+    def __init__(self, complexity: int, project_type: int, ideal_for: int):
+        self.complexity = complexity
+        self.project_type = project_type
+        self.ideal_for = ideal_for
+
+# Keyword Matching
+# Pattern sets up to this size are matched with `in` checks even when pyahocorasick is installed
+AUTOMATON_MIN_PATTERNS = 128
+
+class TaskMatches(frozenset):
+    """Keyword patterns found in a description, their bitmask over the matcher's vocabulary, and
+    quantized BM25 relevance and semantic similarities"""
+
+    def __new__(cls, patterns=(), bm25: tuple = (), mask: Optional[int] = None, semantic: tuple = ()):
+        matches = super().__new__(cls, patterns)
+        matches.bm25 = bm25
+        matches.mask = mask
+        matches.semantic = semantic
+        return matches
+
+class KeywordMatcher:
+    """Finds every pattern occurring in a text, returned as a bitmask over the pattern vocabulary.
+    
+    Small pattern sets are checked with one `pattern in text` each, which runs in C and beats
+    any automaton walked from Python. Sets larger than AUTOMATON_MIN_PATTERNS use a C
+    Aho-Corasick automaton (pyahocorasick) so one pass over the text finds them all, and fall
+    back to the `in` checks when it is not installed.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = sorted(set(patterns))
+        self.vocabulary = Vocabulary(self.patterns)
+        # Empty patterns match every text, mirroring `"" in text`
+        self._always = self.vocabulary.bit("") if "" in self.vocabulary else 0
+        self._ids = [(pattern, self.vocabulary.ids[pattern]) for pattern in self.patterns if pattern]
+        self._automaton = self._build_automaton()
+
+    def _build_automaton(self):
+        if ahocorasick is None or len(self._ids) <= AUTOMATON_MIN_PATTERNS:
+            return None
+        automaton = ahocorasick.Automaton()
+        for pattern, pattern_id in self._ids:
+            automaton.add_word(pattern, pattern_id)
+        automaton.make_automaton()
+        return automaton
+
+    def __getstate__(self):
+        # Rebuilt on load, so an engine artifact does not depend on the optional module
+        return {**self.__dict__, "_automaton": None}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._automaton = self._build_automaton()
+
+    def scan(self, text: str) -> int:
+        """Bitmask of the patterns that occur in text (already normalized by the caller)"""
+        matched = self._always
+        if self._automaton is not None:
+            for _, pattern_id in self._automaton.iter(text):
+                matched |= 1 << pattern_id
+            return matched
+        for pattern, pattern_id in self._ids:
+            if pattern in text:
+                matched |= 1 << pattern_id
+        return matched
+
+    def mask(self, patterns) -> int:
+        return self.vocabulary.mask(patterns)
+
+    def count(self, text: str) -> Dict[int, int]:
+        """Occurrences of each non-empty pattern in text, overlapping ones included, by pattern ID"""
+        counts = {}
+        if self._automaton is not None:
+            for _, pattern_id in self._automaton.iter(text):
+                counts[pattern_id] = counts.get(pattern_id, 0) + 1
+            return counts
+        for pattern, pattern_id in self._ids:
+            start = text.find(pattern)
+            while start != -1:
+                counts[pattern_id] = counts.get(pattern_id, 0) + 1
+                start = text.find(pattern, start + 1)
+        return counts
+
+# Response Cache
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "4096"))
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with hit/miss/eviction counters"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+# Static Payloads
+def encode_json(data: Any) -> bytes:
+    """Compact UTF-8 JSON, byte-for-byte what FastAPI's JSONResponse renders"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+class JSONCodec:
+    """Builds JSON documents from already encoded parts"""
+    name = "json"
+    media_type = "application/json"
+
+    def value(self, data: Any) -> bytes:
+        return encode_json(data)
+
+    def pair(self, key: str, value: bytes) -> bytes:
+        return encode_json(key) + b":" + value
+
+    def map(self, pairs: List[bytes]) -> bytes:
+        return b"{" + b",".join(pairs) + b"}"
+
+    def array(self, items: List[bytes]) -> bytes:
+        return b"[" + b",".join(items) + b"]"
+
+class MessagePackCodec:
+    """Builds MessagePack documents from already encoded parts; containers only need a length header"""
+    name = "msgpack"
+    media_type = "application/msgpack"
+
+    def value(self, data: Any) -> bytes:
+        return msgpack.packb(data)
+
+    def pair(self, key: str, value: bytes) -> bytes:
+        return msgpack.packb(key) + value
+
+    def map(self, pairs: List[bytes]) -> bytes:
+        return self._header(len(pairs), 0x80, b"\xde", b"\xdf") + b"".join(pairs)
+
+    def array(self, items: List[bytes]) -> bytes:
+        return self._header(len(items), 0x90, b"\xdc", b"\xdd") + b"".join(items)
+
+    @staticmethod
+    def _header(size: int, fix: int, marker16: bytes, marker32: bytes) -> bytes:
+        if size < 16:
+            return bytes([fix | size])
+        if size < 1 << 16:
+            return marker16 + size.to_bytes(2, "big")
+        return marker32 + size.to_bytes(4, "big")
+
+# Response encodings by name; snapshots pre-encode agent data for each of them
+CODECS = {"json": JSONCodec()}
+if msgpack is not None:
+    CODECS["msgpack"] = MessagePackCodec()
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+def _media_qualities(accept: str) -> Dict[str, float]:
+    accepted = {}
+    for part in accept.split(","):
+        media_type, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type.strip():
+            accepted[media_type.strip().lower()] = quality
+    return accepted
+
+def select_codec(accept: str) -> Optional[str]:
+    """Response encoding for an Accept header: MessagePack when the client prefers it, else JSON.
+    
+    Returns None when the client only accepts MessagePack and it is not available. Anything
+    else, including a missing header or only unrelated types, gets JSON as it always has.
+    """
+    accepted = _media_qualities(accept)
+    json_quality = accepted.get("application/json", accepted.get("application/*", accepted.get("*/*", 0.0)))
+    msgpack_quality = max(accepted.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    if msgpack_quality > json_quality:
+        if "msgpack" in CODECS:
+            return "msgpack"
+        return "json" if json_quality > 0 else None
+    return "json"
+
+AGENTS_CACHE_MAX_AGE = int(os.environ.get("AGENTS_CACHE_MAX_AGE", "60"))
+
+class PrecompressedPayload:
+    """A JSON body serialized once, with gzip/brotli variants and a strong ETag per encoding"""
+
+    def __init__(self, data: Any):
+        body = encode_json(data)
+        tag = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {"identity": (body, f'"{tag}"')}
+        self.variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{tag}-gzip"')
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body, quality=11), f'"{tag}-br"')
+        self.etags = {etag for _, etag in self.variants.values()}
+
+    def select_encoding(self, accept_encoding: str) -> str:
+        """Pick the best available encoding the client accepts, preferring brotli over gzip"""
+        accepted = {}
+        for part in accept_encoding.split(","):
+            coding, _, params = part.strip().partition(";")
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[coding.strip().lower()] = quality
+        for coding in ("br", "gzip"):
+            if coding in self.variants and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+                return coding
+        return "identity"
+
+    def not_modified(self, if_none_match: str) -> bool:
+        """True if any entity tag in If-None-Match (weak comparison) is one of ours"""
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag in self.etags:
+                return True
+        return False
+
+    def response(self, request: Request) -> Response:
+        encoding = self.select_encoding(request.headers.get("accept-encoding", ""))
+        body, etag = self.variants[encoding]
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={AGENTS_CACHE_MAX_AGE}",
+            "Vary": "Accept-Encoding",
+        }
+        if self.not_modified(request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+# Task analysis rules: for each field, the first value whose words appear in the description wins
+ANALYSIS_RULES = {
+    "complexity": [
+        ("simple", ["simple", "basic", "quick", "prototype", "demo"]),
+        ("complex", ["complex", "enterprise", "large", "advanced", "production"]),
+    ],
+    "project_type": [
+        ("web_application", ["web app", "website", "frontend"]),
+        ("api_backend", ["api", "backend", "server"]),
+        ("mobile_application", ["mobile", "app", "android", "ios"]),
+        ("enterprise_application", ["enterprise", "business"]),
+    ],
+    "workflow": [
+        ("github_integrated", ["github", "git", "version control"]),
+        ("deployment_focused", ["deploy", "deployment", "hosting"]),
+        ("collaborative", ["collaborate", "team", "share"]),
+    ],
+    "experience_level": [
+        ("beginner", ["beginner", "new", "learning", "first time"]),
+        ("advanced", ["advanced", "expert", "experienced"]),
+    ],
+}
+
+# Agent attributes interned into bitmasks, by analysis field -> knowledge base key
+AGENT_ATTRIBUTES = {
+    "complexity": "complexity_handling",
+    "project_type": "project_types",
+    "ideal_for": "ideal_for",
+    "pricing_tier": "pricing_tiers",
+}
+
+# Weight of the BM25 full-text signal and its term-saturation/length-normalization parameters;
+# override per knowledge base under "scoring": {"bm25": {...}}
+# Relevance is normalized to the best agent and rounded to multiples of step, like the semantic
+# similarities below (default 0.01 / weight)
+BM25_DEFAULTS = {"weight": 0.1, "k1": 1.2, "b": 0.75, "step": None}
+
+# Weight of the semantic similarity signal, its n-gram hashing and LSH parameters, and word
+# expansions applied before hashing; override under "scoring": {"semantic": {...}}
+SEMANTIC_DEFAULTS = {
+    "weight": 0.1,
+    "dimensions": 4096,
+    "ngram_range": [3, 5],
+    "min_similarity": 0.2,
+    "synonyms": {},
+    "tables": 16,
+    "bits": None,
+    "lsh_min_rows": 512,
+    # Similarities are rounded to multiples of step before scoring and caching. The default,
+    # 0.01 / weight, is the smallest change that can move a score rounded to 2 decimals, so
+    # finer steps would only split the response cache between identical answers.
+    "step": None,
+    # Only the first max_chars characters of a description are vectorized. Hashing costs time
+    # in proportion to the text and runs before the response cache lookup, while a task's
+    # gist is in its opening sentences.
+    "max_chars": 2000,
 }
 
 # Scoring Algorithm
-class RecommendationEngine:
-    def __init__(self):
-        self.keyword_weights = {
-            # Task type keywords
-            "web app": {"Replit": 0.9, "Copilot": 0.8, "Cursor": 0.7},
-            "website": {"Replit": 0.9, "Copilot": 0.7, "Cursor": 0.6},
-            "api": {"Copilot": 0.9, "Cursor": 0.8, "Replit": 0.7},
-            "mobile": {"Copilot": 0.8, "Cursor": 0.7, "Replit": 0.6},
-            "enterprise": {"Copilot": 0.95, "Cursor": 0.8, "Replit": 0.4},
-            "prototype": {"Replit": 0.95, "Copilot": 0.6, "Cursor": 0.5},
-            "mvp": {"Replit": 0.9, "Copilot": 0.7, "Cursor": 0.6},
-            
-            # Complexity indicators
-            "simple": {"Replit": 0.9, "Copilot": 0.8, "Cursor": 0.7},
-            "complex": {"Cursor": 0.9, "Copilot": 0.9, "Replit": 0.5},
-            "large": {"Cursor": 0.95, "Copilot": 0.8, "Replit": 0.4},
-            "refactor": {"Cursor": 0.95, "Copilot": 0.8, "Replit": 0.3},
-            
-            # Workflow keywords
-            "github": {"Copilot": 0.95, "Cursor": 0.6, "Replit": 0.5},
-            "collaboration": {"Copilot": 0.9, "Replit": 0.8, "Cursor": 0.6},
-            "deployment": {"Replit": 0.9, "Copilot": 0.7, "Cursor": 0.6},
-            "security": {"Copilot": 0.9, "Cursor": 0.7, "Replit": 0.6},
-            
-            # Experience level
-            "beginner": {"Replit": 0.9, "Copilot": 0.7, "Cursor": 0.5},
-            "learning": {"Replit": 0.9, "Copilot": 0.8, "Cursor": 0.6},
-            "education": {"Replit": 0.95, "Copilot": 0.7, "Cursor": 0.5},
+class EngineSnapshot:
+    """Everything compiled from one version of the knowledge base.
+    
+    A snapshot is never modified after construction: a reload builds a new one, so code
+    holding a snapshot keeps a consistent view of agents, indexes and cached responses.
+    """
+
+    def __init__(self, knowledge_base: Dict[str, Dict[str, Any]], keyword_weights: Dict[str, Dict[str, float]],
+                 version: int = 0, scoring: Optional[Dict[str, Any]] = None):
+        self.version = version
+        self.knowledge_base = knowledge_base
+        self.keyword_weights = keyword_weights
+        self.analysis_rules = ANALYSIS_RULES
+        scoring = scoring or {}
+        
+        # Compile every pattern the engine looks for into a single matcher
+        patterns = set(self.keyword_weights)
+        for rules in self.analysis_rules.values():
+            for _, words in rules:
+                patterns.update(words)
+        for agent_data in self.knowledge_base.values():
+            patterns.update(agent_data.get("ideal_for", []))
+        self.matcher = KeywordMatcher(patterns)
+        self._analysis_masks = {
+            field: [(value, self.matcher.mask(words)) for value, words in rules]
+            for field, rules in self.analysis_rules.items()
         }
+        self._compile_attributes()
+        self._compile_scoring_matrix()
+        
+        # Full-text relevance of each agent's capabilities, use cases and tools
+        bm25 = {**BM25_DEFAULTS, **scoring.get("bm25", {})}
+        self.bm25_weight = bm25["weight"]
+        self.bm25 = BM25Index(
+            [tokenize(" ".join(agent_data.get("capabilities", []) + agent_data["use_cases"] + agent_data["tools"]))
+             for agent_data in self.knowledge_base.values()],
+            k1=bm25["k1"],
+            b=bm25["b"],
+            step=bm25["step"] or (0.01 / self.bm25_weight if self.bm25_weight else 1.0),
+        )
+        
+        # Similarity of the description to each agent's closest use case, capability or strength
+        semantic = {**SEMANTIC_DEFAULTS, **scoring.get("semantic", {})}
+        self.semantic_weight = semantic["weight"]
+        self.semantic = SemanticIndex(
+            [agent_data["use_cases"] + agent_data.get("capabilities", []) + agent_data["strengths"]
+             for agent_data in self.knowledge_base.values()],
+            dimensions=semantic["dimensions"],
+            ngram_range=tuple(semantic["ngram_range"]),
+            synonyms=semantic["synonyms"],
+            min_similarity=semantic["min_similarity"],
+            tables=semantic["tables"],
+            bits=semantic["bits"],
+            lsh_min_rows=semantic["lsh_min_rows"],
+            step=semantic["step"] or (0.01 / self.semantic_weight if self.semantic_weight else 1.0),
+            max_chars=semantic["max_chars"],
+        )
+        self._compile_response_fragments()
+        self.agents_payload = PrecompressedPayload(self.knowledge_base)
+        self.response_cache = LRUCache(RESPONSE_CACHE_SIZE)
     
-    def analyze_task(self, description: str) -> Dict[str, str]:
-        """Analyze the task description to extract key characteristics"""
+    def __getstate__(self):
+        # The response cache belongs to one process and always starts empty
+        state = self.__dict__.copy()
+        del state["response_cache"]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.response_cache = LRUCache(RESPONSE_CACHE_SIZE)
+    
+    def _compile_attributes(self):
+        """Intern agent attributes into per-agent bitmask records and per-value agent bitmasks"""
+        self.vocabularies = {field: Vocabulary() for field in AGENT_ATTRIBUTES}
+        # field -> value ID -> bitmask of the agents (by index) that have the value
+        self._postings = {field: [] for field in AGENT_ATTRIBUTES}
+        self.agent_attributes = []
+        for index, agent_data in enumerate(self.knowledge_base.values()):
+            ids = {}
+            for field, key in AGENT_ATTRIBUTES.items():
+                vocabulary, postings = self.vocabularies[field], self._postings[field]
+                ids[field] = tuple(vocabulary.add(value) for value in agent_data.get(key, []))
+                postings.extend([0] * (len(vocabulary) - len(postings)))
+                for value_id in ids[field]:
+                    postings[value_id] |= 1 << index
+            self.agent_attributes.append(AgentAttributes(
+                index,
+                sum(1 << i for i in set(ids["complexity"])),
+                sum(1 << i for i in set(ids["project_type"])),
+                sum(1 << i for i in set(ids["ideal_for"])),
+                ids["ideal_for"],
+            ))
+        
+        # Matcher patterns that affect scoring, and the ideal_for bit each tag pattern sets
+        ideal_vocabulary = self.vocabularies["ideal_for"]
+        self._ideal_pattern_mask = self.matcher.mask(ideal_vocabulary.ids)
+        self._signature_mask = self.matcher.mask(self.keyword_weights) | self._ideal_pattern_mask
+    
+    def _compile_scoring_matrix(self):
+        """Compile the knowledge base and keyword weights into an agent x feature weight matrix"""
+        self.agent_names = list(self.knowledge_base)
+        self._agent_index = agent_index = {name: i for i, name in enumerate(self.agent_names)}
+        
+        # Feature columns, in the same order calculate_score adds them up
+        self._keyword_columns = {keyword: i for i, keyword in enumerate(self.keyword_weights)}
+        columns = len(self._keyword_columns)
+        self._complexity_columns = {}
+        self._project_type_columns = {}
+        self._ideal_columns = {}
+        for agent_data in self.knowledge_base.values():
+            for value in agent_data["complexity_handling"]:
+                self._complexity_columns.setdefault(value, len(self._complexity_columns))
+            for value in agent_data.get("project_types", []):
+                self._project_type_columns.setdefault(value, len(self._project_type_columns))
+            for value in agent_data.get("ideal_for", []):
+                self._ideal_columns.setdefault(value, len(self._ideal_columns))
+        for table in (self._complexity_columns, self._project_type_columns, self._ideal_columns):
+            for value in table:
+                table[value] += columns
+            columns += len(table)
+        
+        matrix = np.zeros((len(self.agent_names), columns))
+        for keyword, agent_scores in self.keyword_weights.items():
+            for agent_name, weight in agent_scores.items():
+                if agent_name in agent_index:
+                    matrix[agent_index[agent_name], self._keyword_columns[keyword]] = weight * 0.3
+        for agent_name, agent_data in self.knowledge_base.items():
+            row = agent_index[agent_name]
+            for value in set(agent_data["complexity_handling"]):
+                matrix[row, self._complexity_columns[value]] = 0.2
+            for value in set(agent_data.get("project_types", [])):
+                matrix[row, self._project_type_columns[value]] = 0.2
+            for value in agent_data.get("ideal_for", []):
+                matrix[row, self._ideal_columns[value]] += 0.15
+        self._score_matrix = matrix
+        self._keyword_pattern_mask = self.matcher.mask(self._keyword_columns)
+    
+    def match_keywords(self, description: str) -> TaskMatches:
+        """Scan the description once and return every known pattern it contains, its BM25 relevance and semantic matches"""
         description_lower = description.lower()
+        bm25 = self.bm25.query(self.bm25.query_terms(description_lower)) if self.bm25_weight else ()
+        semantic = ()
+        if self.semantic_weight:
+            semantic = self.semantic.query(self.semantic.vectorize(tokenize(description_lower[:self.semantic.max_chars])))
+        mask = self.matcher.scan(description_lower)
+        return TaskMatches(self.matcher.vocabulary.values(mask), bm25, mask, semantic)
+    
+    def pattern_mask(self, matches: frozenset) -> int:
+        """Bitmask of the matched patterns over the matcher's vocabulary"""
+        mask = getattr(matches, "mask", None)
+        return self.matcher.mask(matches) if mask is None else mask
+    
+    def encode_analysis(self, analysis: Dict[str, str], matches: frozenset) -> TaskProfile:
+        """Encode a task against the attribute vocabularies; unknown values encode to 0 and match nothing"""
+        ideal_patterns = self.matcher.vocabulary.values(self.pattern_mask(matches) & self._ideal_pattern_mask)
+        return TaskProfile(
+            self.vocabularies["complexity"].bit(analysis["complexity"]),
+            self.vocabularies["project_type"].bit(analysis["project_type"]),
+            self.vocabularies["ideal_for"].mask(ideal_patterns),
+        )
+    
+    def filter_agents(self, complexity: Optional[str] = None, project_type: Optional[str] = None,
+                      pricing_tier: Optional[str] = None, ideal_for: Iterable[str] = ()) -> np.ndarray:
+        """Boolean mask over agent_names of agents with the complexity, project type, pricing tier and every ideal_for tag"""
+        eligible = (1 << len(self.agent_names)) - 1
+        required = [("complexity", complexity), ("project_type", project_type), ("pricing_tier", pricing_tier)]
+        required.extend(("ideal_for", tag) for tag in ideal_for)
+        for field, value in required:
+            if value is None:
+                continue
+            value_id = self.vocabularies[field].ids.get(value)
+            eligible &= 0 if value_id is None else self._postings[field][value_id]
+        packed = np.frombuffer(eligible.to_bytes(len(self.agent_names) // 8 + 1, "little"), dtype=np.uint8)
+        return np.unpackbits(packed, bitorder="little")[:len(self.agent_names)].astype(bool)
+    
+    def text_relevance(self, matches: frozenset) -> Optional[np.ndarray]:
+        """Weighted BM25 signal per agent, from the quantized relevance in the matches (the best match gets the full weight)"""
+        levels = getattr(matches, "bm25", ())
+        if not levels or not self.bm25_weight:
+            return None
+        relevance = np.zeros(len(self.agent_names))
+        agents, values = zip(*levels)
+        relevance[list(agents)] = np.array(values) * self.bm25.step
+        return self.bm25_weight * relevance
+    
+    def semantic_relevance(self, matches: frozenset) -> Optional[np.ndarray]:
+        """Weighted semantic similarity per agent, from the quantized similarities in the matches"""
+        similarities = getattr(matches, "semantic", ())
+        if not similarities or not self.semantic_weight:
+            return None
+        relevance = np.zeros(len(self.agent_names))
+        agents, levels = zip(*similarities)
+        relevance[list(agents)] = np.array(levels) * self.semantic.step
+        return self.semantic_weight * relevance
+    
+    def signature(self, analysis: Dict[str, str], matches: frozenset) -> tuple:
+        """Everything a recommendation depends on: the analysis, matched keywords and ideal_for tags, and the
+        quantized BM25 relevance and semantic similarities"""
+        return (
+            analysis["complexity"],
+            analysis["project_type"],
+            analysis["workflow"],
+            analysis["experience_level"],
+            self.pattern_mask(matches) & self._signature_mask,
+            getattr(matches, "bm25", ()),
+            getattr(matches, "semantic", ()),
+        )
+    
+    def analyze_task(self, description: str, matches: Optional[frozenset] = None) -> Dict[str, str]:
+        """Analyze the task description to extract key characteristics"""
+        if matches is None:
+            matches = self.match_keywords(description)
         
         analysis = {
             "complexity": "medium",
@@ -183,70 +1142,224 @@ class RecommendationEngine:
             "experience_level": "intermediate"
         }
         
-        # Determine complexity
-        if any(word in description_lower for word in ["simple", "basic", "quick", "prototype", "demo"]):
-            analysis["complexity"] = "simple"
-        elif any(word in description_lower for word in ["complex", "enterprise", "large", "advanced", "production"]):
-            analysis["complexity"] = "complex"
-        
-        # Determine project type
-        if any(word in description_lower for word in ["web app", "website", "frontend"]):
-            analysis["project_type"] = "web_application"
-        elif any(word in description_lower for word in ["api", "backend", "server"]):
-            analysis["project_type"] = "api_backend"
-        elif any(word in description_lower for word in ["mobile", "app", "android", "ios"]):
-            analysis["project_type"] = "mobile_application"
-        elif any(word in description_lower for word in ["enterprise", "business"]):
-            analysis["project_type"] = "enterprise_application"
-        
-        # Determine workflow needs
-        if any(word in description_lower for word in ["github", "git", "version control"]):
-            analysis["workflow"] = "github_integrated"
-        elif any(word in description_lower for word in ["deploy", "deployment", "hosting"]):
-            analysis["workflow"] = "deployment_focused"
-        elif any(word in description_lower for word in ["collaborate", "team", "share"]):
-            analysis["workflow"] = "collaborative"
-        
-        # Determine experience level
-        if any(word in description_lower for word in ["beginner", "new", "learning", "first time"]):
-            analysis["experience_level"] = "beginner"
-        elif any(word in description_lower for word in ["advanced", "expert", "experienced"]):
-            analysis["experience_level"] = "advanced"
+        mask = self.pattern_mask(matches)
+        for field, rules in self._analysis_masks.items():
+            for value, rule_mask in rules:
+                if mask & rule_mask:
+                    analysis[field] = value
+                    break
         
         return analysis
     
-    def calculate_score(self, agent_name: str, description: str, analysis: Dict[str, str]) -> float:
+    def calculate_score(self, agent_name: str, description: str, analysis: Dict[str, str],
+                        matches: Optional[frozenset] = None) -> float:
         """Calculate a score for an agent based on task description and analysis"""
+        if matches is None:
+            matches = self.match_keywords(description)
         base_score = 0.5
-        description_lower = description.lower()
         
         # Apply keyword-based scoring
         for keyword, agent_scores in self.keyword_weights.items():
-            if keyword in description_lower:
+            if keyword in matches:
                 if agent_name in agent_scores:
                     base_score += agent_scores[agent_name] * 0.3
         
         # Apply analysis-based scoring
-        agent_data = AGENT_KNOWLEDGE_BASE[agent_name]
+        attributes = self.agent_attributes[self._agent_index[agent_name]]
+        profile = self.encode_analysis(analysis, matches)
         
         # Complexity matching
-        if analysis["complexity"] in agent_data["complexity_handling"]:
+        if profile.complexity & attributes.complexity:
             base_score += 0.2
         
         # Project type matching
-        if analysis["project_type"] in agent_data.get("project_types", []):
+        if profile.project_type & attributes.project_types:
             base_score += 0.2
         
         # Ideal use case matching
-        for ideal_case in agent_data.get("ideal_for", []):
-            if ideal_case in description_lower:
+        for ideal_id in attributes.ideal_ids:
+            if profile.ideal_for >> ideal_id & 1:
                 base_score += 0.15
         
+        # Full-text relevance
+        relevance = self.text_relevance(matches)
+        if relevance is not None:
+            base_score += float(relevance[self._agent_index[agent_name]])
+        
+        # Semantic similarity
+        similarity = self.semantic_relevance(matches)
+        if similarity is not None:
+            base_score += float(similarity[self._agent_index[agent_name]])
+        
         return min(1.0, base_score)
     
+    def _compile_response_fragments(self):
+        """Pre-encode each agent's static AgentRecommendation fields, as key/value pairs, in every codec"""
+        static = [
+            {
+                "name": agent_name,
+                "strengths": agent_data["strengths"][:4],  # Top 4 strengths
+                "use_cases": agent_data["use_cases"][:4],  # Top 4 use cases
+                "pricing": agent_data["pricing"],
+                "tools": agent_data["tools"][:6],  # Top 6 tools
+            }
+            for agent_name, agent_data in ((name, self.knowledge_base[name]) for name in self.agent_names)
+        ]
+        # codec name -> agent index -> field -> encoded pair
+        self._agent_fragments = {
+            name: [{field: codec.pair(field, codec.value(value)) for field, value in fields.items()} for fields in static]
+            for name, codec in CODECS.items()
+        }
+    
+    def justify(self, analysis: Dict[str, str], scores: np.ndarray, ranked: List[int]) -> List[str]:
+        """Justifications for the ranked agent indices"""
+        return [self.generate_justification(self.agent_names[i], float(scores[i]), analysis) for i in ranked]
+    
+    def encode_recommendations(self, analysis: Dict[str, str], scores: np.ndarray, ranked: List[int],
+                               justifications: Optional[List[str]], page: Optional[Dict[str, Any]] = None,
+                               fields: Optional[tuple] = None, codec: str = "json") -> bytes:
+        """Encode a RecommendationResponse for the ranked agents straight to bytes.
+        
+        fields projects each recommendation (None keeps all of them); justifications may be None
+        when the projection leaves them out.
+        """
+        encoder = CODECS[codec]
+        fragments = self._agent_fragments[codec]
+        fields = fields or RECOMMENDATION_FIELDS
+        recommendations = []
+        for position, index in enumerate(ranked):
+            pairs = []
+            for field in fields:
+                if field == "score":
+                    pairs.append(encoder.pair("score", encoder.value(round(float(scores[index]), 2))))
+                elif field == "justification":
+                    pairs.append(encoder.pair("justification", encoder.value(justifications[position])))
+                else:
+                    pairs.append(fragments[index][field])
+            recommendations.append(encoder.map(pairs))
+        body = [
+            encoder.pair("recommendations", encoder.array(recommendations)),
+            encoder.pair("task_analysis", encoder.value(analysis)),
+        ]
+        if page is not None:
+            body.append(encoder.pair("page", encoder.value(page)))
+        return encoder.map(body)
+    
+    def render_recommendations(self, analysis: Dict[str, str], scores: np.ndarray, k: int = 3,
+                               fields: Optional[tuple] = None) -> bytes:
+        """Encode a RecommendationResponse for the k best agents straight to JSON bytes, projected to fields"""
+        ranked = self.top_agents(scores, k)
+        justifications = self.justify(analysis, scores, ranked) if fields is None or "justification" in fields else None
+        return self.encode_recommendations(analysis, scores, ranked, justifications, fields=fields)
+    
+    def _active_columns(self, analysis: Dict[str, str], matches: frozenset) -> List[int]:
+        """Feature columns that apply to a task, in ascending (calculate_score) order"""
+        mask = self.pattern_mask(matches)
+        patterns = self.matcher.vocabulary.values
+        columns = sorted(self._keyword_columns[p] for p in patterns(mask & self._keyword_pattern_mask))
+        if analysis["complexity"] in self._complexity_columns:
+            columns.append(self._complexity_columns[analysis["complexity"]])
+        if analysis["project_type"] in self._project_type_columns:
+            columns.append(self._project_type_columns[analysis["project_type"]])
+        columns.extend(sorted(self._ideal_columns[p] for p in patterns(mask & self._ideal_pattern_mask)))
+        return columns
+    
+    def score_agents(self, analysis: Dict[str, str], matches: frozenset,
+                     candidates: Optional[np.ndarray] = None) -> np.ndarray:
+        """Score every agent (or only the candidate indices) at once; element i equals calculate_score for that agent"""
+        # Add the active feature columns one at a time, in calculate_score's order, so every agent's
+        # floating point sum is bit-identical to the per-agent path (a BLAS dot product reorders it)
+        columns = self._active_columns(analysis, matches)
+        if candidates is None:
+            scores = np.full(len(self.agent_names), 0.5)
+            for column in columns:
+                scores += self._score_matrix[:, column]
+        else:
+            # Gather only the candidates' active features; other agents are never touched
+            features = self._score_matrix[np.ix_(candidates, columns)]
+            scores = np.full(len(candidates), 0.5)
+            for j in range(len(columns)):
+                scores += features[:, j]
+        relevance = self.text_relevance(matches)
+        if relevance is not None:
+            # Normalized against the best agent overall, so a filter never changes an agent's score
+            scores += relevance if candidates is None else relevance[candidates]
+        similarity = self.semantic_relevance(matches)
+        if similarity is not None:
+            scores += similarity if candidates is None else similarity[candidates]
+        return np.minimum(scores, 1.0, out=scores)
+    
+    def rank_page(self, analysis: Dict[str, str], matches: frozenset,
+                  query: PageQuery) -> Tuple[np.ndarray, List[int], Dict[str, Any]]:
+        """Score the agents passing the query's filters and rank the window [offset, offset + top_k).
+        
+        Returns scores indexed by agent (only candidates are filled in), the ranked agent indices
+        and the page description for the response.
+        """
+        complexity, project_type, pricing_tier, ideal_for = query.filters
+        if complexity is None and project_type is None and pricing_tier is None and not ideal_for:
+            candidates = None
+            scores = self.score_agents(analysis, matches)
+            total = len(self.agent_names)
+            ranked = self.top_agents(scores, query.offset + query.top_k)[query.offset:]
+        else:
+            candidates = np.flatnonzero(self.filter_agents(complexity, project_type, pricing_tier, ideal_for))
+            candidate_scores = self.score_agents(analysis, matches, candidates)
+            total = len(candidates)
+            window = self.top_agents(candidate_scores, query.offset + query.top_k)[query.offset:]
+            ranked = candidates[window].tolist()
+            scores = np.empty(len(self.agent_names))
+            scores[candidates] = candidate_scores
+        
+        end = query.offset + len(ranked)
+        page = {
+            "offset": query.offset,
+            "top_k": query.top_k,
+            "total": total,
+            "next_cursor": encode_cursor(end) if end < total else None,
+        }
+        return scores, ranked, page
+    
+    def score_agents_batch(self, analyses: List[Dict[str, str]], matches: List[frozenset]) -> np.ndarray:
+        """Score every agent for a batch of tasks; column j equals score_agents for task j"""
+        active = np.zeros((self._score_matrix.shape[1], len(analyses)), dtype=bool)
+        for task, (analysis, task_matches) in enumerate(zip(analyses, matches)):
+            active[self._active_columns(analysis, task_matches), task] = True
+        
+        # Walk the features in column order so each task sees the same sequence of additions as score_agents
+        scores = np.full((len(self.agent_names), len(analyses)), 0.5)
+        for column in np.flatnonzero(active.any(axis=1)):
+            tasks = active[column]
+            scores[:, tasks] += self._score_matrix[:, column, None]
+        for task, task_matches in enumerate(matches):
+            relevance = self.text_relevance(task_matches)
+            if relevance is not None:
+                scores[:, task] += relevance
+            similarity = self.semantic_relevance(task_matches)
+            if similarity is not None:
+                scores[:, task] += similarity
+        return np.minimum(scores, 1.0, out=scores)
+    
+    def top_agents(self, scores: np.ndarray, k: int) -> List[int]:
+        """Indices of the k best agents, ranked by rounded score with ties kept in knowledge base order.
+        
+        Uses a linear-time partial selection and only sorts the k (plus near-tied) survivors, and the
+        ranking is a total order, so top_agents(scores, n + k)[n:] is always the next page after n.
+        """
+        if k <= 0:
+            return []
+        if k < len(scores):
+            cutoff = scores[np.argpartition(-scores, k - 1)[:k]].min()
+            # Rounding to two decimals can tie agents just below the cutoff with ones above it
+            candidates = np.flatnonzero(scores >= cutoff - 0.01)
+        else:
+            candidates = np.arange(len(scores))
+        ranked = sorted(candidates.tolist(), key=lambda i: round(float(scores[i]), 2), reverse=True)
+        return ranked[:k]
+    
     def generate_justification(self, agent_name: str, score: float, analysis: Dict[str, str]) -> str:
         """Generate a justification for why this agent was recommended"""
-        agent_data = AGENT_KNOWLEDGE_BASE[agent_name]
+        agent_data = self.knowledge_base[agent_name]
         
         if score >= 0.8:
             strength = "Excellent"
@@ -270,50 +1383,549 @@ class RecommendationEngine:
         
         return justification.strip()
 
-# Initialize recommendation engine
+class RecommendationEngine:
+    """Serves recommendations from an EngineSnapshot that is swapped atomically on reload.
+    
+    Request handlers read `engine.snapshot` once and use it for the whole request, so a reload
+    never changes the data under an in-flight request and readers never take a lock. Attribute
+    access falls through to the current snapshot (engine.analyze_task, engine.calculate_score, ...).
+    
+    Nothing is loaded until the snapshot is first used, so importing this module stays cheap.
+    Loading prefers the prebuilt artifact and compiles from the knowledge base when it is
+    missing, stale or corrupt.
+    """
+
+    def __init__(self, path: str = KNOWLEDGE_BASE_PATH, artifact_path: str = ENGINE_ARTIFACT_PATH):
+        self.path = path
+        self.artifact_path = artifact_path
+        self.loaded_from = None
+        self._snapshot = None
+        self._version = 0
+        self._source_stamp = None
+        # Serializes reloads; readers never touch it
+        self._reload_lock = threading.Lock()
+        self._first_load_lock = threading.Lock()
+        self._stop_watching = threading.Event()
+        self._watcher = None
+
+    @property
+    def snapshot(self) -> EngineSnapshot:
+        snapshot = self._snapshot
+        return snapshot if snapshot is not None else self.ensure_loaded()
+
+    def ensure_loaded(self) -> EngineSnapshot:
+        """Load the engine now if nothing has been loaded yet"""
+        with self._first_load_lock:
+            if self._snapshot is None:
+                self.reload()
+        return self._snapshot
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.snapshot, name)
+
+    def _install(self, snapshot: EngineSnapshot, source: str) -> EngineSnapshot:
+        with self._reload_lock:
+            self._version += 1
+            snapshot.version = self._version
+            # A single reference assignment: requests see either the old or the new snapshot
+            self._snapshot = snapshot
+            self.loaded_from = source
+        return snapshot
+
+    def load(self, knowledge_base: Dict[str, Dict[str, Any]], keyword_weights: Dict[str, Dict[str, float]],
+             scoring: Optional[Dict[str, Any]] = None) -> EngineSnapshot:
+        """Compile a new snapshot from in-memory data and make it current"""
+        return self._install(EngineSnapshot(knowledge_base, keyword_weights, scoring=scoring), "compiled")
+
+    def _read_artifact(self) -> Optional[EngineSnapshot]:
+        """The prebuilt snapshot if it matches the current knowledge base and code, else None"""
+        if not self.artifact_path or not os.path.exists(self.artifact_path):
+            return None
+        try:
+            # Classes were pickled from the `main` module; resolve them here even when run as __main__
+            snapshot = read_artifact(self.artifact_path, artifact_metadata(self.path), aliases={"main": __name__})
+        except ArtifactError as e:
+            logger.warning("Not using engine artifact: %s; compiling from %s", e, self.path)
+            return None
+        return snapshot if isinstance(snapshot, EngineSnapshot) else None
+
+    def _stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self, force: bool = True) -> bool:
+        """Rebuild from the knowledge base file; without force, only if the file changed"""
+        stamp = self._stamp()
+        if not force and stamp == self._source_stamp:
+            return False
+        # Remember the stamp even if loading fails, so a broken file is reported once, not every poll
+        self._source_stamp = stamp
+        snapshot = self._read_artifact()
+        if snapshot is not None:
+            self._install(snapshot, "artifact")
+        else:
+            knowledge_base, keyword_weights, scoring = load_knowledge_base(self.path)
+            snapshot = self.load(knowledge_base, keyword_weights, scoring)
+        logger.info("Loaded knowledge base %s from %s (version %d, %d agents)",
+                    self.path, self.loaded_from, snapshot.version, len(snapshot.knowledge_base))
+        return True
+
+    def _watch(self, interval: float):
+        while not self._stop_watching.wait(interval):
+            try:
+                self.reload(force=False)
+            except Exception:
+                # Keep serving the last good snapshot until the file is fixed
+                logger.exception("Failed to reload knowledge base %s", self.path)
+
+    def start_watching(self, interval: float = KNOWLEDGE_BASE_RELOAD_INTERVAL):
+        """Poll the knowledge base file and hot-reload it from a background thread"""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="knowledge-base-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+
+def build_engine_artifact(path: str = KNOWLEDGE_BASE_PATH, artifact_path: str = ENGINE_ARTIFACT_PATH) -> int:
+    """Compile the knowledge base into a prebuilt engine artifact; returns its size in bytes"""
+    metadata = artifact_metadata(path)
+    knowledge_base, keyword_weights, scoring = load_knowledge_base(path)
+    if artifact_metadata(path) != metadata:
+        raise RuntimeError(f"{path} changed while the engine was being built; try again")
+    return write_artifact(artifact_path, EngineSnapshot(knowledge_base, keyword_weights, scoring=scoring), metadata)
+
+# Initialize recommendation engine (loaded on first use)
 engine = RecommendationEngine()
 
-@app.post("/recommend", response_model=RecommendationResponse)
-async def get_recommendations(request: TaskRequest):
+def recommend(description: str, query: Optional[PageQuery] = None, fields: Optional[tuple] = None,
+              codec: str = "json") -> bytes:
+    """Recommend agents for one description as an encoded RecommendationResponse, cached by signature"""
+    snapshot = engine.snapshot
+    DESCRIPTION_CHARS.observe(len(description))
+    # Scan the description once and share the matches between analysis and scoring
+    with STAGE_SECONDS.time("match"):
+        matches = snapshot.match_keywords(description)
+    with STAGE_SECONDS.time("analyze"):
+        analysis = snapshot.analyze_task(description, matches)
+    return recommend_analyzed(snapshot, analysis, matches, query=query, fields=fields, codec=codec)
+
+def recommend_analyzed(snapshot: EngineSnapshot, analysis: Dict[str, str], matches: frozenset,
+                       signature: Optional[tuple] = None, query: Optional[PageQuery] = None,
+                       fields: Optional[tuple] = None, codec: str = "json") -> bytes:
+    """Encoded RecommendationResponse for an already analyzed task, from the signature cache when possible"""
+    if signature is None:
+        signature = snapshot.signature(analysis, matches)
+    plain = query is None and fields is None and codec == "json"
+    key = signature if plain else (signature, query, fields, codec)
+    response = snapshot.response_cache.get(key)
+    if response is None:
+        # Score every (eligible) agent in one pass and only build the requested recommendations
+        with STAGE_SECONDS.time("score"):
+            if query is None:
+                scores = snapshot.score_agents(analysis, matches)
+                ranked = snapshot.top_agents(scores, 3)
+                page = None
+            else:
+                scores, ranked, page = snapshot.rank_page(analysis, matches, query)
+        justifications = None
+        if fields is None or "justification" in fields:
+            with STAGE_SECONDS.time("justify"):
+                justifications = snapshot.justify(analysis, scores, ranked)
+        with STAGE_SECONDS.time("serialize"):
+            response = snapshot.encode_recommendations(analysis, scores, ranked, justifications, page, fields, codec)
+        snapshot.response_cache.put(key, response)
+    return response
+
+# /recommend bodies come pre-encoded in either codec, so the schema is documented for both media types
+RECOMMEND_RESPONSE_SCHEMA = {"anyOf": [
+    {"$ref": "#/components/schemas/RecommendationResponse"},
+    {"$ref": "#/components/schemas/ProjectedRecommendationResponse"},
+]}
+RECOMMEND_RESPONSES = {
+    200: {
+        "description": "Recommendations as JSON, or as MessagePack when the Accept header prefers it. "
+                       "A RecommendationResponse, or a ProjectedRecommendationResponse carrying only the "
+                       "requested recommendation fields when the request sets `fields`.",
+        "content": {"application/msgpack": {"schema": RECOMMEND_RESPONSE_SCHEMA}},
+    },
+    406: {"description": "Only MessagePack is acceptable and the server has no msgpack support"},
+}
+
+@app.post("/recommend", response_model=Union[RecommendationResponse, ProjectedRecommendationResponse],
+          responses=RECOMMEND_RESPONSES)
+async def get_recommendations(request: TaskRequest, http_request: Request):
     """Get AI coding agent recommendations based on task description"""
+    codec = select_codec(http_request.headers.get("accept", ""))
+    if codec is None:
+        raise HTTPException(status_code=406, detail="MessagePack responses are not available on this server")
+    try:
+        query = page_query(request)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
-        # Analyze the task
-        analysis = engine.analyze_task(request.description)
+        # The body is pre-encoded to the RecommendationResponse schema, so skip model validation
+        body = await scoring.run(recommend, request.description, query, projection(request), codec)
+        return Response(content=body, media_type=CODECS[codec].media_type, headers={"Vary": "Accept"})
         
-        # Calculate scores for each agent
-        recommendations = []
+    except Overloaded as e:
+        return JSONResponse({"detail": str(e)}, status_code=503, headers={"Retry-After": SCORING_RETRY_AFTER})
+    except Exception as e:
+        ERRORS_TOTAL.inc("/recommend", type(e).__name__)
+        logger.exception("Error generating recommendations")
+        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+
+# Live Recommendations
+LIVE_DEBOUNCE_SECONDS = float(os.environ.get("LIVE_DEBOUNCE_SECONDS", "0.05"))
+# Longest description a live session holds, whether it is set whole or grown through edits
+LIVE_MAX_DESCRIPTION_CHARS = int(os.environ.get("LIVE_MAX_DESCRIPTION_CHARS", "20000"))
+
+class LiveEditRejected(ValueError):
+    """A live message that was not applied; code tells the client how to recover"""
+
+    def __init__(self, code: str, message: str, **extra):
+        super().__init__(message)
+        self.code = code
+        self.extra = extra
+
+class TaskEdit(BaseModel):
+    """Replace description[start:end] with text"""
+    start: int
+    end: int
+    text: str = ""
+
+def _is_token_char(ch: str) -> bool:
+    return TOKEN_PATTERN.fullmatch(ch.lower()) is not None
+
+class LiveSession:
+    """Incremental matching state for one description that is being edited.
+    
+    Keeps occurrence counts per keyword pattern, per BM25 term and per semantic n-gram bucket,
+    so an edit only rescans a window around the changed range (widened by the longest pattern,
+    then out to word boundaries) instead of the whole description. Scoring only runs when an edit changes the signature.
+    """
+
+    def __init__(self, snapshot: EngineSnapshot):
+        self.description = ""
+        self.last_response = None
+        self._reset(snapshot)
+
+    def _reset(self, snapshot: EngineSnapshot):
+        self.snapshot = snapshot
+        self.reach = max((len(pattern) for pattern in snapshot.matcher.patterns), default=1) - 1
+        self.pattern_counts: Dict[int, int] = {}
+        self.term_counts: Dict[str, int] = {}
+        self.feature_counts = np.zeros(snapshot.semantic.dimensions, dtype=np.int64)
+        self.mask = snapshot.matcher.scan("")
+        self.signature = None
+        self._count(self.description, 1)
+
+    def _count(self, text: str, sign: int):
+        """Add (sign=1) or remove (sign=-1) every pattern and term occurrence found in text"""
+        text = text.lower()
+        matcher = self.snapshot.matcher
+        for pattern_id, occurrences in matcher.count(text).items():
+            count = self.pattern_counts.get(pattern_id, 0) + sign * occurrences
+            if count:
+                self.pattern_counts[pattern_id] = count
+                self.mask |= 1 << pattern_id
+            else:
+                del self.pattern_counts[pattern_id]
+                self.mask &= ~(1 << pattern_id)
+        if self.snapshot.bm25_weight:
+            vocabulary = self.snapshot.bm25.vocabulary
+            for term in TOKEN_PATTERN.findall(text):
+                if term not in vocabulary:
+                    continue
+                count = self.term_counts.get(term, 0) + sign
+                if count:
+                    self.term_counts[term] = count
+                else:
+                    del self.term_counts[term]
+        if self.snapshot.semantic_weight:
+            self.feature_counts += sign * self.snapshot.semantic.vectorize(tokenize(text))
+
+    def set_description(self, description: str):
+        if len(description) > LIVE_MAX_DESCRIPTION_CHARS:
+            raise LiveEditRejected("too_long", f"Description is longer than {LIVE_MAX_DESCRIPTION_CHARS} characters",
+                                   max_chars=LIVE_MAX_DESCRIPTION_CHARS)
+        self.description = description
+        self._reset(self.snapshot)
+
+    def apply_edit(self, edit: TaskEdit):
+        """Replace description[start:end] with the edit's text, rescanning only around the edit"""
+        old = self.description
+        start, end, text = edit.start, edit.end, edit.text
+        if not 0 <= start <= end <= len(old):
+            raise LiveEditRejected("range", f"Edit range {start}:{end} is outside the description (length {len(old)})")
+        if len(old) - (end - start) + len(text) > LIVE_MAX_DESCRIPTION_CHARS:
+            raise LiveEditRejected("too_long", f"Edit would make the description longer than {LIVE_MAX_DESCRIPTION_CHARS} characters",
+                                   max_chars=LIVE_MAX_DESCRIPTION_CHARS)
+        new = old[:start] + text + old[end:]
         
-        for agent_name, agent_data in AGENT_KNOWLEDGE_BASE.items():
-            score = engine.calculate_score(agent_name, request.description, analysis)
-            justification = engine.generate_justification(agent_name, score, analysis)
-            
-            recommendation = AgentRecommendation(
-                name=agent_name,
-                score=round(score, 2),
-                justification=justification,
-                strengths=agent_data["strengths"][:4],  # Top 4 strengths
-                use_cases=agent_data["use_cases"][:4],  # Top 4 use cases
-                pricing=agent_data["pricing"],
-                tools=agent_data["tools"][:6]  # Top 6 tools
-            )
-            recommendations.append(recommendation)
-        
-        # Sort by score (descending)
-        recommendations.sort(key=lambda x: x.score, reverse=True)
-        
-        # Return top 3 recommendations
-        return RecommendationResponse(
-            recommendations=recommendations[:3],
-            task_analysis=analysis
-        )
+        # Any occurrence touching the edit lies within reach characters of it; widening to word
+        # boundaries keeps tokens whole. Text outside the window is identical before and after.
+        left = max(0, start - self.reach)
+        while left > 0 and _is_token_char(old[left - 1]):
+            left -= 1
+        right = min(len(old), end + self.reach)
+        while right < len(old) and _is_token_char(old[right]):
+            right += 1
+        old_window = old[left:right]
+        new_window = new[left:right - end + start + len(text)]
         
+        self.description = new
+        if len(old_window.lower()) != len(old_window) or len(new_window.lower()) != len(new_window):
+            # Lowercasing changed the length, so window offsets no longer line up; rescan everything
+            self._reset(self.snapshot)
+            return
+        self._count(old_window, -1)
+        self._count(new_window, 1)
+
+    def matches(self) -> TaskMatches:
+        snapshot = self.snapshot
+        bm25 = snapshot.bm25.query(frozenset(self.term_counts)) if snapshot.bm25_weight else ()
+        semantic = ()
+        if snapshot.semantic_weight:
+            counts = self.feature_counts
+            description_lower = self.description.lower()
+            if len(description_lower) > snapshot.semantic.max_chars:
+                # Past the cap the counts cover more than match_keywords vectorizes; the capped prefix is cheap to redo
+                counts = snapshot.semantic.vectorize(tokenize(description_lower[:snapshot.semantic.max_chars]))
+            semantic = snapshot.semantic.query(counts)
+        return TaskMatches(snapshot.matcher.vocabulary.values(self.mask), bm25, self.mask, semantic)
+
+    def recommendations(self) -> Optional[bytes]:
+        """The current RecommendationResponse JSON, or None when it has not changed since the last call"""
+        if self.snapshot is not engine.snapshot:
+            # The knowledge base was reloaded: pattern IDs and terms may differ, so recount once
+            self._reset(engine.snapshot)
+        snapshot = self.snapshot
+        matches = self.matches()
+        analysis = snapshot.analyze_task(self.description, matches)
+        signature = snapshot.signature(analysis, matches)
+        if signature == self.signature:
+            return None
+        self.signature = signature
+        response = recommend_analyzed(snapshot, analysis, matches, signature)
+        if response == self.last_response:
+            return None
+        self.last_response = response
+        return response
+
+LIVE_SESSIONS = set()
+METRICS.gauge("live_sessions", "Open /recommend/live WebSocket sessions", lambda: len(LIVE_SESSIONS))
+
+def _apply_live_message(session: LiveSession, raw: str) -> Optional[bytes]:
+    """Apply one client message to the session; returns an error message for invalid input.
+    
+    Errors carry a code: "range" when an edit does not fit the server's text (the client should
+    resend the whole description), "too_long" past LIVE_MAX_DESCRIPTION_CHARS (with max_chars;
+    resending cannot help until the text is shorter) and "invalid" for malformed messages.
+    """
+    try:
+        message = json.loads(raw)
+        if isinstance(message, dict) and "description" in message:
+            session.set_description(TaskRequest.model_validate(message).description)
+        else:
+            session.apply_edit(TaskEdit.model_validate(message))
+    except ValidationError as e:
+        ERRORS_TOTAL.inc("/recommend/live", type(e).__name__)
+        return encode_json({"error": "Invalid edit", "code": "invalid", "detail": json.loads(e.json(include_url=False))})
+    except LiveEditRejected as e:
+        ERRORS_TOTAL.inc("/recommend/live", type(e).__name__)
+        return encode_json({"error": str(e), "code": e.code, **e.extra})
+    except ValueError as e:
+        ERRORS_TOTAL.inc("/recommend/live", type(e).__name__)
+        return encode_json({"error": str(e), "code": "invalid"})
+    return None
+
+def _live_update(session: LiveSession, messages: List[str]) -> Tuple[List[bytes], Optional[bytes]]:
+    """Apply a burst of client messages, then re-score; returns the error messages and the new response"""
+    with STAGE_SECONDS.time("live_update"):
+        errors = [_apply_live_message(session, raw) for raw in messages]
+        return [error for error in errors if error is not None], session.recommendations()
+
+@app.websocket("/recommend/live")
+async def live_recommendations(websocket: WebSocket):
+    """Push recommendations while a description is being typed.
+    
+    The client sends {"description": ...} to set the whole text and {"start", "end", "text"}
+    edits to replace a range of it; a rejected edit is reported as {"error": ..., "code": ...}
+    (see _apply_live_message) and leaves the text unchanged. Messages arriving within LIVE_DEBOUNCE_SECONDS of the first
+    one in a burst are applied together, and a RecommendationResponse is pushed only when the
+    top 3 or the task analysis changes. Bursts run on the scoring executor like /recommend; when
+    it sheds load, the client gets {"error": ..., "code": "overloaded"} and the burst is retried
+    with later messages, so the client must not resend anything.
+    """
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    session = LiveSession(engine.snapshot)
+    LIVE_SESSIONS.add(session)
+    messages = []
+    try:
+        while True:
+            if not messages:
+                messages.append(await websocket.receive_text())
+            deadline = loop.time() + LIVE_DEBOUNCE_SECONDS
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    messages.append(await asyncio.wait_for(websocket.receive_text(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Edits cost O(edit size), but a whole new description is a full rescan and a changed
+            # signature re-scores, so the burst waits for a scoring slot instead of blocking the loop
+            try:
+                errors, response = await scoring.run_local(_live_update, session, messages)
+            except Overloaded as e:
+                # Nothing was applied; keep the burst so later edits still line up with the text
+                await websocket.send_text(encode_json({"error": str(e), "code": "overloaded"}).decode())
+                await asyncio.sleep(float(SCORING_RETRY_AFTER))
+                continue
+            messages = []
+            for error in errors:
+                await websocket.send_text(error.decode())
+            if response is not None:
+                await websocket.send_text(response.decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        LIVE_SESSIONS.discard(session)
+
+BATCH_CHUNK_SIZE = 256
+
+def _error_line(index: int, error: str, detail: Any = None, exception: Optional[Exception] = None) -> bytes:
+    if exception is not None:
+        ERRORS_TOTAL.inc("/recommend/batch", type(exception).__name__)
+    line = {"index": index, "error": error}
+    if detail is not None:
+        line["detail"] = detail
+    return encode_json(line) + b"\n"
+
+def recommend_chunk(items: List[Any], first_index: int = 0, raw: bool = False) -> List[bytes]:
+    """Score a chunk of tasks together and return one NDJSON line per task, in order.
+    
+    Items are TaskRequest-shaped objects, or JSON documents when raw is True. Error lines
+    report the item's position as first_index plus its offset in the chunk.
+    """
+    snapshot = engine.snapshot
+    lines = [b""] * len(items)
+    # Tasks in the chunk that missed the cache, grouped by response cache key so each response is
+    # rendered once, and by signature so each is scored once whatever projections it was asked for
+    pending = {}  # cache key -> (score column, fields, offsets)
+    columns = {}  # signature -> score column
+    analyses, matches = [], []
+    
+    with STAGE_SECONDS.time("batch_analyze"):
+        for offset, item in enumerate(items):
+            try:
+                task = TaskRequest.model_validate_json(item) if raw else TaskRequest.model_validate(item)
+                DESCRIPTION_CHARS.observe(len(task.description))
+                task_matches = snapshot.match_keywords(task.description)
+                analysis = snapshot.analyze_task(task.description, task_matches)
+                signature = snapshot.signature(analysis, task_matches)
+                query = page_query(task)
+                fields = projection(task)
+                if query is not None:
+                    # Filtered or paged tasks are handled on their own rather than in the shared batch matrix
+                    lines[offset] = recommend_analyzed(snapshot, analysis, task_matches, signature, query, fields) + b"\n"
+                    continue
+                # The same keys recommend_analyzed uses, so batch and single requests share cache entries
+                key = signature if fields is None else (signature, None, fields, "json")
+                if key not in pending:
+                    cached = snapshot.response_cache.get(key)
+                    if cached is not None:
+                        lines[offset] = cached + b"\n"
+                        continue
+                    if signature not in columns:
+                        columns[signature] = len(analyses)
+                        analyses.append(analysis)
+                        matches.append(task_matches)
+                    pending[key] = (columns[signature], fields, [])
+                pending[key][2].append(offset)
+            except ValidationError as e:
+                lines[offset] = _error_line(first_index + offset, "Invalid task", json.loads(e.json(include_url=False)), exception=e)
+            except Exception as e:
+                lines[offset] = _error_line(first_index + offset, f"Error generating recommendations: {str(e)}", exception=e)
+    
+    try:
+        with STAGE_SECONDS.time("batch_score"):
+            scores = snapshot.score_agents_batch(analyses, matches) if pending else None
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+        for _, _, offsets in pending.values():
+            for offset in offsets:
+                lines[offset] = _error_line(first_index + offset, f"Error generating recommendations: {str(e)}", exception=e)
+        pending = {}
+    
+    with STAGE_SECONDS.time("batch_render"):
+        for key, (column, fields, offsets) in pending.items():
+            try:
+                response = snapshot.render_recommendations(analyses[column], scores[:, column], fields=fields)
+                snapshot.response_cache.put(key, response)
+                line = response + b"\n"
+                for offset in offsets:
+                    lines[offset] = line
+            except Exception as e:
+                for offset in offsets:
+                    lines[offset] = _error_line(first_index + offset, f"Error generating recommendations: {str(e)}", exception=e)
+    
+    return lines
+
+def _recommend_chunk_bytes(items: List[Any], first_index: int) -> bytes:
+    return b"".join(recommend_chunk(items, first_index))
+
+async def stream_batch_recommendations(items: List[Any]):
+    """Yield NDJSON lines for the batch, scoring one chunk at a time on the scoring executor"""
+    for start in range(0, len(items), BATCH_CHUNK_SIZE):
+        chunk = items[start:start + BATCH_CHUNK_SIZE]
+        try:
+            yield await scoring.run(_recommend_chunk_bytes, chunk, start)
+        except Overloaded as e:
+            # Headers are already sent, so shed load per chunk with inline errors
+            yield b"".join(_error_line(start + offset, str(e), exception=e) for offset in range(len(chunk)))
+
+@app.post("/recommend/batch")
+async def get_batch_recommendations(tasks: List[Any] = Body(...)):
+    """Get recommendations for a list of tasks, streamed back as NDJSON in input order.
+    
+    Each line is either a RecommendationResponse or {"index": ..., "error": ...} for a task
+    that could not be processed, so one bad task does not fail the whole batch.
+    """
+    BATCH_TASKS.observe(len(tasks))
+    return StreamingResponse(stream_batch_recommendations(tasks), media_type="application/x-ndjson")
 
 @app.get("/agents")
-async def get_all_agents():
-    """Get information about all available coding agents"""
-    return AGENT_KNOWLEDGE_BASE
+async def get_all_agents(request: Request):
+    """Get information about all available coding agents.
+    
+    The body is serialized and compressed once per knowledge base; clients can revalidate
+    with If-None-Match and get a 304 while it is unchanged.
+    """
+    return engine.snapshot.agents_payload.response(request)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics: request/stage latency histograms, request sizes, errors and cache stats"""
+    return Response(content=METRICS.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/debug/profile", include_in_schema=False)
+async def get_profile(seconds: float = 10.0, interval: float = 0.005):
+    """Sample all threads for `seconds` and return folded stacks for a flame graph (ENABLE_PROFILER=1)"""
+    if not ENABLE_PROFILER:
+        raise HTTPException(status_code=404, detail="Not Found")
+    seconds = min(max(seconds, 0.1), PROFILER_MAX_SECONDS)
+    stacks = await run_in_threadpool(profiler.profile, seconds, max(interval, 0.001))
+    if stacks is None:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    return PlainTextResponse(stacks)
 
 @app.get("/")
 async def root():
@@ -321,9 +1933,13 @@ async def root():
     return {
         "message": "AI Coding Agent Recommendation System API",
         "version": "1.0.0",
+        "knowledge_base_version": engine.snapshot.version,
+        "engine_source": engine.loaded_from,
         "endpoints": {
             "/recommend": "POST - Get agent recommendations",
+            "/recommend/batch": "POST - Get recommendations for many tasks (NDJSON stream)",
             "/agents": "GET - Get all agent information",
+            "/metrics": "GET - Prometheus metrics",
             "/docs": "GET - API documentation"
         }
     }
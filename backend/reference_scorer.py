@@ -0,0 +1,117 @@
+"""
+The original per-agent scorer the compiled engine replaced, kept verbatim as a reference.
+
+The tests check the engine reproduces it exactly, and the benchmark times the engine against
+it so the engine can never quietly become slower than the code it replaced.
+"""
+from typing import Any, Dict
+
+
+def analyze_task(description: str) -> Dict[str, str]:
+    """Analyze the task description to extract key characteristics"""
+    description_lower = description.lower()
+
+    analysis = {
+        "complexity": "medium",
+        "project_type": "general",
+        "workflow": "standard",
+        "experience_level": "intermediate"
+    }
+
+    # Determine complexity
+    if any(word in description_lower for word in ["simple", "basic", "quick", "prototype", "demo"]):
+        analysis["complexity"] = "simple"
+    elif any(word in description_lower for word in ["complex", "enterprise", "large", "advanced", "production"]):
+        analysis["complexity"] = "complex"
+
+    # Determine project type
+    if any(word in description_lower for word in ["web app", "website", "frontend"]):
+        analysis["project_type"] = "web_application"
+    elif any(word in description_lower for word in ["api", "backend", "server"]):
+        analysis["project_type"] = "api_backend"
+    elif any(word in description_lower for word in ["mobile", "app", "android", "ios"]):
+        analysis["project_type"] = "mobile_application"
+    elif any(word in description_lower for word in ["enterprise", "business"]):
+        analysis["project_type"] = "enterprise_application"
+
+    # Determine workflow needs
+    if any(word in description_lower for word in ["github", "git", "version control"]):
+        analysis["workflow"] = "github_integrated"
+    elif any(word in description_lower for word in ["deploy", "deployment", "hosting"]):
+        analysis["workflow"] = "deployment_focused"
+    elif any(word in description_lower for word in ["collaborate", "team", "share"]):
+        analysis["workflow"] = "collaborative"
+
+    # Determine experience level
+    if any(word in description_lower for word in ["beginner", "new", "learning", "first time"]):
+        analysis["experience_level"] = "beginner"
+    elif any(word in description_lower for word in ["advanced", "expert", "experienced"]):
+        analysis["experience_level"] = "advanced"
+
+    return analysis
+
+
+def calculate_score(agents: Dict[str, Dict[str, Any]], keyword_weights: Dict[str, Dict[str, float]],
+                    agent_name: str, description: str, analysis: Dict[str, str]) -> float:
+    """Calculate a score for an agent based on task description and analysis"""
+    base_score = 0.5
+    description_lower = description.lower()
+
+    # Apply keyword-based scoring
+    for keyword, agent_scores in keyword_weights.items():
+        if keyword in description_lower:
+            if agent_name in agent_scores:
+                base_score += agent_scores[agent_name] * 0.3
+
+    # Apply analysis-based scoring
+    agent_data = agents[agent_name]
+
+    # Complexity matching
+    if analysis["complexity"] in agent_data["complexity_handling"]:
+        base_score += 0.2
+
+    # Project type matching
+    if analysis["project_type"] in agent_data.get("project_types", []):
+        base_score += 0.2
+
+    # Ideal use case matching
+    for ideal_case in agent_data.get("ideal_for", []):
+        if ideal_case in description_lower:
+            base_score += 0.15
+
+    return min(1.0, base_score)
+
+
+def generate_justification(agent_name: str, score: float, analysis: Dict[str, str]) -> str:
+    """Generate a justification for why this agent was recommended"""
+    if score >= 0.8:
+        strength = "Excellent"
+    elif score >= 0.6:
+        strength = "Good"
+    else:
+        strength = "Moderate"
+
+    justification = f"{strength} match for your requirements. "
+
+    # Add specific reasons based on analysis
+    if analysis["complexity"] == "simple" and agent_name == "Replit":
+        justification += "Replit excels at rapid prototyping and simple applications with no setup required. "
+    elif analysis["complexity"] == "complex" and agent_name in ["Cursor", "Copilot"]:
+        justification += f"{agent_name} handles complex projects well with advanced AI capabilities. "
+
+    if analysis["project_type"] == "web_application" and agent_name == "Replit":
+        justification += "Perfect for web apps with built-in deployment and database. "
+    elif analysis["workflow"] == "github_integrated" and agent_name == "Copilot":
+        justification += "Native GitHub integration makes it ideal for GitHub-based workflows. "
+
+    return justification.strip()
+
+
+def score_agents(agents: Dict[str, Dict[str, Any]], keyword_weights: Dict[str, Dict[str, float]],
+                 description: str) -> Dict[str, float]:
+    """Analyze a description and score every agent, the work the original /recommend did per request"""
+    analysis = analyze_task(description)
+    return {
+        agent_name: calculate_score(agents, keyword_weights, agent_name, description, analysis)
+        for agent_name in agents
+    }
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Open-loop replay of captured traffic (see CAPTURE_DIR) against the API.
+
+Requests are sent on schedule whether or not earlier ones have been answered, so a slow
+build sees the same arrival pattern production did instead of being paced by its own
+latency. Without --url the app is driven in-process through an ASGI transport:
+
+    python replay.py captures/                                  # original pacing, in-process
+    python replay.py captures/ --url http://localhost:8000 --speed 4
+    python replay.py captures/ --rate 500 --limit 20000
+
+Latency is reported from the actual send and from the intended send time. The second is
+corrected for coordinated omission: it includes time a request spent waiting because the
+sender fell behind schedule, which a closed-loop load generator would silently leave out.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import Counter
+
+import httpx
+
+from capture import read_capture
+from metrics import percentile
+
+PERCENTILES = [("p50", 0.50), ("p90", 0.90), ("p99", 0.99), ("p999", 0.999)]
+
+
+def schedule(records, speed=1.0, rate=None):
+    """Intended send time of each record, in seconds from the start of the replay"""
+    if rate is not None:
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        return [i / rate for i in range(len(records))]
+    if speed <= 0:
+        raise ValueError(f"speed must be positive, got {speed}")
+    first = records[0][0]
+    return [(arrival - first) / speed for arrival, _, _, _ in records]
+
+
+def positive_float(value):
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+async def replay(records, offsets, client):
+    """Send every record at its offset without waiting for responses; returns (intended, sent, done, status) tuples"""
+    loop = asyncio.get_running_loop()
+    results = []
+
+    async def send(path, body, accept, intended):
+        headers = {"Content-Type": "application/json"}
+        if accept is not None:
+            headers["Accept"] = accept
+        sent = loop.time()
+        try:
+            response = await client.post(path, content=body, headers=headers)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        results.append((intended, sent, loop.time(), status))
+
+    start = loop.time()
+    tasks = []
+    for (_, path, body, accept), offset in zip(records, offsets):
+        intended = start + offset
+        delay = intended - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(path, body, accept, intended)))
+    await asyncio.gather(*tasks)
+    return start, results
+
+
+def latency_summary(samples):
+    """Percentiles and max of a list of seconds, in milliseconds"""
+    samples = sorted(samples)
+    summary = {name: round(percentile(samples, fraction) * 1e3, 3) for name, fraction in PERCENTILES}
+    summary["max"] = round(samples[-1] * 1e3, 3) if samples else 0.0
+    return summary
+
+
+def summarize(start, results, offsets):
+    statuses = Counter(status for _, _, _, status in results)
+    succeeded = sum(count for status, count in statuses.items() if status.startswith("2"))
+    finished = max(done for _, _, done, _ in results) - start if results else 0.0
+    return {
+        "requests": len(results),
+        "succeeded": succeeded,
+        "statuses": dict(sorted(statuses.items())),
+        "offered_per_s": round(len(offsets) / offsets[-1], 1) if offsets and offsets[-1] else None,
+        "achieved_per_s": round(succeeded / finished, 1) if finished else 0.0,
+        "service_ms": latency_summary([done - sent for _, sent, done, _ in results]),
+        "corrected_ms": latency_summary([done - intended for intended, _, done, _ in results]),
+        "send_lag_ms": latency_summary([sent - intended for intended, sent, _, _ in results]),
+    }
+
+
+def print_report(report):
+    offered = report["offered_per_s"]
+    print(f"requests   {report['requests']} ({report['succeeded']} succeeded), statuses {report['statuses']}")
+    print(f"throughput {report['achieved_per_s']:.1f}/s achieved" + (f", {offered:.1f}/s offered" if offered else ""))
+    print(f"{'latency ms':<14}" + "".join(f"{name:>10}" for name, _ in PERCENTILES) + f"{'max':>10}")
+    for key, label in (("service_ms", "service"), ("corrected_ms", "corrected"), ("send_lag_ms", "send lag")):
+        stats = report[key]
+        print(f"{label:<14}" + "".join(f"{stats[name]:>10.2f}" for name, _ in PERCENTILES) + f"{stats['max']:>10.2f}")
+
+
+async def run(args, records, offsets):
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout)
+    else:
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay",
+                                   limits=limits, timeout=args.timeout)
+    async with client:
+        return await replay(records, offsets, client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured API traffic open-loop")
+    parser.add_argument("capture", nargs="+", help="capture segment files or directories")
+    parser.add_argument("--url", help="base URL of a running instance (default: drive the app in-process)")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--speed", type=positive_float, default=1.0, help="replay at N times the captured pace (default 1)")
+    pacing.add_argument("--rate", type=positive_float, help="ignore captured timing and send at a fixed requests/s")
+    parser.add_argument("--limit", type=int, help="replay only the first N captured requests")
+    parser.add_argument("--connections", type=int, default=256, help="maximum open connections")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    records = read_capture(args.capture)[:args.limit]
+    if not records:
+        print("✗ No captured requests found", file=sys.stderr)
+        return 1
+    offsets = schedule(records, args.speed, args.rate)
+    start, results = asyncio.run(run(args, records, offsets))
+    report = summarize(start, results, offsets)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0 if report["succeeded"] == report["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,30 @@
 #!/usr/bin/env python3
 """
 Simple script to run both the FastAPI backend and React frontend
+
+    python run.py                        # development: backend + frontend dev servers
+    python run.py --prod --workers 8     # production: pre-forked multi-worker backend
+
+Production mode compiles the knowledge base and engine once in the parent process, then
+forks the workers so they share those read-only structures through copy-on-write pages.
+Send SIGHUP to the parent for a graceful rolling restart (the knowledge base is reloaded
+once in the parent first), SIGTERM or Ctrl+C to stop. The parent also watches the knowledge
+base file and rolls the workers when it changes; the workers themselves never reload it.
 """
+import argparse
+import gc
+import select
+import socket
 import subprocess
 import sys
 import os
+import threading
 import time
 import signal
 from pathlib import Path
 
+BACKEND_DIR = Path(__file__).resolve().parent
+
 def check_requirements():
     """Check if required dependencies are installed"""
     try:
@@ -43,6 +59,9 @@ def run_servers():
     backend_process = subprocess.Popen([
         sys.executable, "backend/main.py"
     ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # Keep reading the backend's output so a full pipe buffer never blocks the server
+    drain_output(backend_process.stdout, sys.stdout, "[backend] ")
+    drain_output(backend_process.stderr, sys.stderr, "[backend] ")
     
     # Wait a moment for backend to start
     time.sleep(3)
@@ -75,5 +94,242 @@ def run_servers():
         backend_process.terminate()
         frontend_process.terminate()
 
+def drain_output(pipe, sink, prefix):
+    """Copy a child process pipe to sink line by line from a background thread"""
+    def pump():
+        for line in iter(pipe.readline, b""):
+            sink.write(prefix + line.decode(errors="replace"))
+            sink.flush()
+        pipe.close()
+
+    thread = threading.Thread(target=pump, daemon=True)
+    thread.start()
+    return thread
+
+def memory_usage_mb(pid):
+    """Resident and proportional (shared pages split between sharers) memory of a process, in MB"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line and not line.startswith(" "))
+        rss = int(fields["Rss"].split()[0]) / 1024
+        pss = int(fields["Pss"].split()[0]) / 1024
+        return rss, pss
+    except (OSError, KeyError, ValueError):
+        return None
+
+class PreforkServer:
+    """Supervises N uvicorn workers forked from a parent that has already built the engine"""
+
+    def __init__(self, app, host, port, workers, ready_timeout=30.0, reload_interval=0.0):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.ready_timeout = ready_timeout
+        self.reload_interval = reload_interval
+        self.children = {}  # pid -> worker slot
+        self.stopping = False
+        self.restart_requested = False
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(2048)
+        self.sock.set_inheritable(True)
+
+    def _run_worker(self, ready_fd):
+        """Child process body: serve on the inherited socket until told to stop"""
+        import uvicorn
+
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        server = uvicorn.Server(uvicorn.Config(self.app, log_level="info"))
+
+        def report_ready():
+            while not server.started and not server.should_exit:
+                time.sleep(0.05)
+            # Closing without writing tells the parent this worker never became ready
+            if server.started:
+                os.write(ready_fd, b"1")
+            os.close(ready_fd)
+
+        threading.Thread(target=report_ready, daemon=True).start()
+        server.run(sockets=[self.sock])
+
+    def spawn(self, slot):
+        """Fork a worker and wait until it is accepting connections; returns (pid, ready)"""
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            code = 0
+            try:
+                self._run_worker(ready_write)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+
+        os.close(ready_write)
+        self.children[pid] = slot
+        readable, _, _ = select.select([ready_read], [], [], self.ready_timeout)
+        ready = bool(readable) and os.read(ready_read, 1) == b"1"
+        os.close(ready_read)
+        usage = memory_usage_mb(pid)
+        memory = f", RSS {usage[0]:.1f} MB / PSS {usage[1]:.1f} MB" if usage else ""
+        state = "ready" if ready else "not ready after timeout"
+        print(f"{'✓' if ready else '✗'} Worker {slot} (pid {pid}) {state}{memory}", flush=True)
+        return pid, ready
+
+    def kill_worker(self, pid):
+        """Kill a worker outright, e.g. one that never became ready"""
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+        self.children.pop(pid, None)
+
+    def stop_worker(self, pid, timeout=30.0):
+        """Ask a worker to finish in-flight requests and exit, killing it after timeout"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            time.sleep(0.05)
+        else:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.children.pop(pid, None)
+
+    def rolling_restart(self, engine):
+        """Reload the knowledge base in the parent, then roll the workers onto it"""
+        print("🔄 Rolling restart: reloading knowledge base in the parent", flush=True)
+        try:
+            engine.reload()
+        except Exception as e:
+            print(f"✗ Knowledge base reload failed, restarting with the current one: {e}", flush=True)
+        self.roll_workers()
+
+    def roll_workers(self):
+        """Replace workers one at a time so capacity never drops by more than one worker"""
+        gc.collect()
+        gc.freeze()
+        for pid, slot in list(self.children.items()):
+            new_pid, ready = self.spawn(slot)
+            if not ready:
+                # Keep the old worker serving rather than swapping in one that cannot take traffic
+                self.kill_worker(new_pid)
+                print(f"✗ Rolling restart aborted: replacement for worker {slot} did not become ready; "
+                      f"remaining workers keep their current knowledge base", flush=True)
+                return False
+            self.stop_worker(pid)
+        print("✅ Rolling restart complete", flush=True)
+        return True
+
+    def poll_knowledge_base(self, engine):
+        """Reload the knowledge base in the parent if its file changed, and roll the workers onto it"""
+        try:
+            changed = engine.reload(force=False)
+        except Exception as e:
+            # Keep the workers on the last good version until the file is fixed
+            print(f"✗ Knowledge base reload failed, keeping the current workers: {e}", flush=True)
+            return
+        if changed:
+            print("🔄 Knowledge base changed: rolling workers", flush=True)
+            self.roll_workers()
+
+    def serve(self, engine):
+        def request_stop(sig, frame):
+            self.stopping = True
+
+        def request_restart(sig, frame):
+            self.restart_requested = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGHUP, request_restart)
+
+        for slot in range(self.workers):
+            self.spawn(slot)
+
+        next_poll = time.monotonic() + self.reload_interval
+        while not self.stopping:
+            if self.restart_requested:
+                self.restart_requested = False
+                self.rolling_restart(engine)
+            elif self.reload_interval > 0 and time.monotonic() >= next_poll:
+                self.poll_knowledge_base(engine)
+                next_poll = time.monotonic() + self.reload_interval
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid and pid in self.children:
+                # A worker died on its own: replace it from the still-compiled parent state
+                slot = self.children.pop(pid)
+                print(f"✗ Worker {slot} (pid {pid}) exited with status {status}, respawning", flush=True)
+                self.spawn(slot)
+            time.sleep(0.2)
+
+        print("\n🛑 Stopping workers...", flush=True)
+        for pid in list(self.children):
+            os.kill(pid, signal.SIGTERM)
+        for pid in list(self.children):
+            self.stop_worker(pid)
+        self.sock.close()
+
+def run_production(host, port, workers):
+    """Build the engine once, then fork workers that share it copy-on-write"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    start = time.perf_counter()
+    import main
+    snapshot = main.engine.ensure_loaded()
+    print(f"✓ Engine ready in {time.perf_counter() - start:.2f}s, {main.engine.loaded_from} "
+          f"(knowledge base version {snapshot.version}, {len(snapshot.knowledge_base)} agents)")
+
+    if not hasattr(os, "fork"):
+        # No fork (Windows): every worker builds its own engine
+        import uvicorn
+        print(f"Starting {workers} uvicorn workers on http://{host}:{port}")
+        uvicorn.run("main:app", host=host, port=port, workers=workers, app_dir=str(BACKEND_DIR))
+        return
+
+    usage = memory_usage_mb(os.getpid())
+    if usage:
+        print(f"  Parent RSS {usage[0]:.1f} MB before fork")
+    # Move everything built so far out of the GC's reach so collections in the workers
+    # do not write to (and un-share) the pages holding the compiled engine
+    gc.collect()
+    gc.freeze()
+
+    # Only the parent watches the knowledge base file; the workers inherit this setting and skip
+    # their own watcher, so an edit is compiled once and rolled out instead of N times in place
+    reload_interval = main.KNOWLEDGE_BASE_RELOAD_INTERVAL
+    main.KNOWLEDGE_BASE_RELOAD_INTERVAL = 0
+    # Spawned scoring processes (SCORING_EXECUTOR=process) re-import main instead of inheriting
+    # it, so they read the interval from the environment; without this each would start a watcher
+    os.environ["KNOWLEDGE_BASE_RELOAD_INTERVAL"] = "0"
+
+    print(f"🚀 Starting {workers} workers on http://{host}:{port}")
+    PreforkServer(main.app, host, port, workers, reload_interval=reload_interval).serve(main.engine)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the AI Coding Agent Recommendation System")
+    parser.add_argument("--prod", action="store_true", help="run only the backend with pre-forked workers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="backend workers in --prod mode")
+    parser.add_argument("--host", default="0.0.0.0", help="bind address in --prod mode")
+    parser.add_argument("--port", type=int, default=8000, help="bind port in --prod mode")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    run_servers() 
\ No newline at end of file
+    args = parse_args()
+    if args.prod:
+        run_production(args.host, args.port, args.workers)
+    else:
+        run_servers()
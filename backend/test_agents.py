@@ -0,0 +1,62 @@
+"""
+/agents: the pre-serialized body, its compressed variants, ETags and conditional requests.
+"""
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+@pytest.fixture
+def client(monkeypatch):
+    engine = main.RecommendationEngine(main.KNOWLEDGE_BASE_PATH, "")
+    engine.ensure_loaded()
+    monkeypatch.setattr(main, "engine", engine)
+    return TestClient(main.app)
+
+def get(client, **headers):
+    return client.get("/agents", headers={"Accept-Encoding": "identity", **headers})
+
+def test_identity_body_and_caching_headers(client):
+    response = get(client)
+    assert response.status_code == 200
+    assert response.json() == main.engine.snapshot.knowledge_base
+    assert response.headers["content-type"] == "application/json"
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == f"public, max-age={main.AGENTS_CACHE_MAX_AGE}"
+    assert "Accept-Encoding" in response.headers["vary"]
+
+def test_compressed_variants_decode_to_the_same_body(client):
+    identity = get(client)
+    compressed = get(client, **{"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.content == identity.content
+    assert compressed.headers["etag"] != identity.headers["etag"]
+    payload = main.engine.snapshot.agents_payload
+    assert gzip.decompress(payload.variants["gzip"][0]) == payload.variants["identity"][0]
+
+@pytest.mark.parametrize("accept_encoding, brotli_encoding", [
+    ("", "identity"),
+    ("identity", "identity"),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("*", "br"),
+    ("*;q=0", "identity"),
+    ("deflate", "identity"),
+    ("GZIP;q=0.5", "gzip"),
+])
+def test_select_encoding(client, accept_encoding, brotli_encoding):
+    payload = main.engine.snapshot.agents_payload
+    expected = brotli_encoding if brotli_encoding != "br" or "br" in payload.variants else "gzip"
+    assert payload.select_encoding(accept_encoding) == expected
+
+def test_matching_etags_get_304(client):
+    etags = {encoding: get(client, **{"Accept-Encoding": encoding}).headers["etag"] for encoding in ("identity", "gzip")}
+    for if_none_match in (etags["identity"], f'W/{etags["identity"]}', f'"other", {etags["gzip"]}', "*"):
+        response = get(client, **{"If-None-Match": if_none_match})
+        assert (response.status_code, response.content) == (304, b""), if_none_match
+        assert response.headers["etag"] == etags["identity"]
+    assert get(client, **{"If-None-Match": '"other"'}).status_code == 200
@@ -0,0 +1,68 @@
+"""
+Loading the engine from a prebuilt artifact, and falling back to compiling when it is unusable.
+"""
+import os
+import shutil
+
+import pytest
+
+import main
+
+DESCRIPTIONS = ["Build a simple todo app with React frontend", "enterprise java migration refactor on github", ""]
+
+@pytest.fixture
+def paths(tmp_path):
+    knowledge_base = tmp_path / "knowledge_base.json"
+    shutil.copy(main.KNOWLEDGE_BASE_PATH, knowledge_base)
+    artifact = tmp_path / "knowledge_base.engine"
+    main.build_engine_artifact(str(knowledge_base), str(artifact))
+    return str(knowledge_base), str(artifact)
+
+def load(knowledge_base, artifact):
+    engine = main.RecommendationEngine(knowledge_base, artifact)
+    engine.ensure_loaded()
+    return engine
+
+def responses(engine):
+    snapshot = engine.snapshot
+    return [
+        main.recommend_analyzed(snapshot, snapshot.analyze_task(description), snapshot.match_keywords(description))
+        for description in DESCRIPTIONS
+    ]
+
+def test_current_artifact_is_used_and_matches_compiled(paths):
+    knowledge_base, artifact = paths
+    engine = load(knowledge_base, artifact)
+    assert engine.loaded_from == "artifact"
+    assert responses(engine) == responses(load(knowledge_base, ""))
+
+def test_stale_artifact_falls_back_to_compiling(paths):
+    knowledge_base, artifact = paths
+    with open(knowledge_base, "a") as f:
+        f.write("\n")
+    engine = load(knowledge_base, artifact)
+    assert engine.loaded_from == "compiled"
+    assert responses(engine) == responses(load(knowledge_base, ""))
+
+@pytest.mark.parametrize("damage", ["flip", "truncate", "garbage", "empty"])
+def test_corrupt_artifact_falls_back_to_compiling(paths, damage):
+    knowledge_base, artifact = paths
+    data = bytearray(open(artifact, "rb").read())
+    if damage == "flip":
+        data[-10] ^= 0xFF
+    elif damage == "truncate":
+        data = data[:-100]
+    elif damage == "garbage":
+        data = bytearray(b"garbage")
+    else:
+        data = bytearray()
+    with open(artifact, "wb") as f:
+        f.write(data)
+    engine = load(knowledge_base, artifact)
+    assert engine.loaded_from == "compiled"
+    assert responses(engine) == responses(load(knowledge_base, ""))
+
+def test_missing_artifact_falls_back_to_compiling(paths):
+    knowledge_base, artifact = paths
+    os.remove(artifact)
+    assert load(knowledge_base, artifact).loaded_from == "compiled"
@@ -0,0 +1,80 @@
+"""
+/recommend/batch: one NDJSON line per task in input order, with per-item error lines.
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from executor import Overloaded
+
+@pytest.fixture
+def client(monkeypatch):
+    engine = main.RecommendationEngine(main.KNOWLEDGE_BASE_PATH, "")
+    engine.ensure_loaded()
+    monkeypatch.setattr(main, "engine", engine)
+    return TestClient(main.app)
+
+def batch(client, tasks):
+    response = client.post("/recommend/batch", json=tasks)
+    assert (response.status_code, response.headers["content-type"]) == (200, "application/x-ndjson")
+    return [json.loads(line) for line in response.content.splitlines()]
+
+def test_lines_match_single_requests_in_input_order(client, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_CHUNK_SIZE", 3)
+    descriptions = ["react web app", "enterprise java refactor", "react web app", "", "deploy an api", "React Web App"]
+    tasks = [{"description": description} for description in descriptions]
+    body = client.post("/recommend/batch", json=tasks).content
+    assert body.splitlines() == [client.post("/recommend", json=task).content for task in tasks]
+    assert body.endswith(b"\n")
+    assert batch(client, []) == []
+
+def test_invalid_items_get_error_lines_with_their_batch_index(client, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_CHUNK_SIZE", 2)
+    tasks = [{"description": "react web app"}, "not an object", {}, {"description": 7},
+             {"description": "api", "top_k": 0}, {"description": "deploy an api"}]
+    lines = batch(client, tasks)
+    assert len(lines) == len(tasks)
+    for index in (0, 5):
+        assert lines[index] == client.post("/recommend", json=tasks[index]).json()
+    for index in (1, 2, 3, 4):
+        assert lines[index]["index"] == index
+        assert lines[index]["error"] == "Invalid task"
+        assert lines[index]["detail"]
+
+def test_scoring_failures_only_fail_the_affected_items(client, monkeypatch):
+    cached = {"description": "react web app"}
+    expected = client.post("/recommend", json=cached).json()
+
+    def fail(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(main.engine.snapshot, "score_agents_batch", fail)
+    lines = batch(client, [{"description": "deploy an api"}, cached, {"description": "enterprise java"}])
+    # The cached response needs no scoring; the others report the error inline
+    assert lines[1] == expected
+    assert [(line["index"], line["error"]) for line in (lines[0], lines[2])] == [
+        (0, "Error generating recommendations: boom"), (2, "Error generating recommendations: boom")
+    ]
+
+def test_shed_chunks_get_inline_errors(client, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_CHUNK_SIZE", 2)
+    run = main.scoring.run
+    calls = []
+
+    async def shed_second_chunk(fn, *args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise Overloaded("queue_full")
+        return await run(fn, *args)
+
+    monkeypatch.setattr(main.scoring, "run", shed_second_chunk)
+    tasks = [{"description": f"react web app {n}"} for n in range(5)]
+    lines = batch(client, tasks)
+    assert [line.get("index") for line in lines] == [None, None, 2, 3, None]
+    assert lines[2]["error"] == "Scoring capacity exhausted (queue_full)"
+    assert lines[4] == client.post("/recommend", json=tasks[4]).json()
+
+def test_body_must_be_a_list(client):
+    assert client.post("/recommend/batch", json={"description": "react"}).status_code == 422
@@ -0,0 +1,84 @@
+"""
+The signature-keyed response cache: hits, eviction, and invalidation when the knowledge base reloads.
+"""
+import json
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    path = tmp_path / "knowledge_base.json"
+    shutil.copy(main.KNOWLEDGE_BASE_PATH, path)
+    engine = main.RecommendationEngine(str(path), "")
+    engine.ensure_loaded()
+    monkeypatch.setattr(main, "engine", engine)
+    return engine
+
+@pytest.fixture
+def client(engine):
+    return TestClient(main.app)
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = main.LRUCache(2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"  # a is now the most recently used
+    cache.put("c", b"3")
+    assert (cache.get("b"), cache.get("a"), cache.get("c")) == (None, b"1", b"3")
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1, "evictions": 1}
+
+def test_zero_size_cache_stores_nothing():
+    cache = main.LRUCache(0)
+    cache.put("a", b"1")
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+def test_same_signature_is_served_from_the_cache(engine, client):
+    cache = engine.snapshot.response_cache
+    first = client.post("/recommend", json={"description": "Build a React web app"}).content
+    assert cache.stats()["misses"] == 1
+    # Matching is case-insensitive, so the signature and the response are unchanged
+    again = client.post("/recommend", json={"description": "BUILD A REACT WEB APP"}).content
+    assert again == first
+    assert (cache.stats()["hits"], cache.stats()["size"]) == (1, 1)
+    client.post("/recommend", json={"description": "enterprise java refactor on github"})
+    assert (cache.stats()["hits"], cache.stats()["size"]) == (1, 2)
+
+def test_cached_responses_match_uncached_ones(engine, client):
+    descriptions = ["react web app", "deploy an api", "react web app", "enterprise java", "deploy an api"]
+    cached = [client.post("/recommend", json={"description": d}).content for d in descriptions]
+    assert engine.snapshot.response_cache.stats()["hits"] == 2
+    engine.snapshot.response_cache.maxsize = 0
+    engine.snapshot.response_cache.clear()
+    assert [client.post("/recommend", json={"description": d}).content for d in descriptions] == cached
+
+def test_engine_cache_evicts_at_maxsize(engine, client):
+    engine.snapshot.response_cache.maxsize = 2
+    for description in ["react web app", "deploy an api", "enterprise java"]:
+        client.post("/recommend", json={"description": description})
+    stats = engine.snapshot.response_cache.stats()
+    assert (stats["size"], stats["evictions"]) == (2, 1)
+
+def test_reload_starts_with_an_empty_cache(engine, client):
+    description = {"description": "Build a simple web app prototype"}
+    before = client.post("/recommend", json=description).json()
+    old_snapshot = engine.snapshot
+    assert old_snapshot.response_cache.stats()["size"] == 1
+
+    data = json.loads(open(engine.path).read())
+    top = before["recommendations"][0]["name"]
+    data["agents"][top]["pricing"] = "Changed pricing"
+    with open(engine.path, "w") as f:
+        json.dump(data, f)
+    assert engine.reload(force=True)
+
+    assert engine.snapshot is not old_snapshot
+    assert engine.snapshot.response_cache.stats()["size"] == 0
+    after = client.post("/recommend", json=description).json()
+    assert after["recommendations"][0]["pricing"] == "Changed pricing"
+    # The old snapshot's cache is left as it was for requests still using it
+    assert old_snapshot.response_cache.stats()["size"] == 1
@@ -0,0 +1,119 @@
+"""
+Traffic capture (capture.py) and open-loop replay of the captured requests (replay.py).
+"""
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import replay
+from capture import CaptureMiddleware, TrafficRecorder, read_capture
+
+def segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith("capture-"))
+
+def test_recorder_writes_records_in_order(tmp_path):
+    written = []
+    recorder = TrafficRecorder(str(tmp_path), batch_size=4, on_record=written.append)
+    recorder.start()
+    for n in range(10):
+        recorder.record(100.0 + n, "/recommend", json.dumps({"description": f"task {n}"}).encode(),
+                        "application/msgpack" if n % 2 else None)
+    recorder.close()
+    assert sum(written) == 10
+    records = read_capture([str(tmp_path)])
+    assert [record[0] for record in records] == [100.0 + n for n in range(10)]
+    assert records[3] == (103.0, "/recommend", b'{"description": "task 3"}', "application/msgpack")
+    assert records[4][3] is None
+
+def test_segments_rotate_and_only_the_newest_are_kept(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path), segment_bytes=1, max_segments=3, batch_size=1)
+    recorder.start()
+    for n in range(8):
+        recorder.record(float(n), "/recommend", b"{}")
+        # One record per batch, so each one fills and closes a segment
+        recorder.close()
+        recorder.start()
+    recorder.close()
+    assert len(segments(tmp_path)) == 3
+    assert [record[0] for record in read_capture([str(tmp_path)])] == [5.0, 6.0, 7.0]
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    dropped = []
+    recorder = TrafficRecorder(str(tmp_path), max_pending=2, on_drop=dropped.append)
+    # Not started yet, so nothing drains the queue
+    for n in range(5):
+        recorder.record(float(n), "/recommend", b"{}")
+    assert sum(dropped) == 3
+    recorder.start()
+    recorder.close()
+    assert len(read_capture([str(tmp_path)])) == 2
+
+def test_torn_last_lines_are_skipped(tmp_path):
+    path = tmp_path / "capture-1-1-00000.jsonl"
+    whole = json.dumps({"ts": 1.0, "path": "/recommend", "body": "{}"})
+    path.write_text(whole + "\n" + whole[:10])
+    assert read_capture([str(path)]) == [(1.0, "/recommend", b"{}", None)]
+
+def test_middleware_records_chunked_bodies_and_the_accept_header(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path))
+    recorder.start()
+
+    async def echo(scope, receive, send):
+        body, more = b"", True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": body})
+
+    client = TestClient(CaptureMiddleware(echo, recorder))
+    chunks = [b'{"description": ', b'"chunked"}']
+    assert client.post("/recommend", content=iter(chunks), headers={"Accept": "application/msgpack"}).content == b"".join(chunks)
+    client.post("/other", content=b"{}")
+    client.get("/recommend", headers={"Accept": "*/*"})
+    recorder.close()
+    records = read_capture([str(tmp_path)])
+    assert [(path, body, accept) for _, path, body, accept in records] == [
+        ("/recommend", b'{"description": "chunked"}', "application/msgpack"),
+        ("/recommend", b"", "*/*"),
+    ]
+
+def test_schedule_keeps_captured_gaps_or_a_fixed_rate():
+    records = [(10.0, "/recommend", b"{}", None), (10.5, "/recommend", b"{}", None), (12.0, "/recommend", b"{}", None)]
+    assert replay.schedule(records) == [0.0, 0.5, 2.0]
+    assert replay.schedule(records, speed=2) == [0.0, 0.25, 1.0]
+    assert replay.schedule(records, rate=4) == [0.0, 0.25, 0.5]
+    for options in ({"speed": 0}, {"rate": -1}):
+        with pytest.raises(ValueError):
+            replay.schedule(records, **options)
+
+def test_replay_sends_the_captured_accept_header(monkeypatch):
+    engine = main.RecommendationEngine(main.KNOWLEDGE_BASE_PATH, "")
+    engine.ensure_loaded()
+    monkeypatch.setattr(main, "engine", engine)
+    body = json.dumps({"description": "react web app"}).encode()
+    records = [(0.0, "/recommend", body, None), (0.01, "/recommend", body, "application/msgpack"),
+               (0.02, "/recommend", b"not json", None)]
+    seen = []
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay",
+                                     event_hooks={"response": [record_response]}) as client:
+            return await replay.replay(records, replay.schedule(records), client)
+
+    async def record_response(response):
+        seen.append(response.headers["content-type"])
+
+    start, results = asyncio.run(run())
+    assert sorted(status for _, _, _, status in results) == ["200", "200", "422"]
+    assert seen.count("application/msgpack") == (1 if "msgpack" in main.CODECS else 0)
+    report = replay.summarize(start, results, replay.schedule(records))
+    assert (report["requests"], report["succeeded"], report["statuses"]) == (3, 2, {"200": 2, "422": 1})
+    assert all(sent <= done for _, sent, done, _ in results)
@@ -0,0 +1,121 @@
+"""
+Admission control accounting of ScoringExecutor: shedding, queue timeouts and cancellation.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from executor import Overloaded, ScoringExecutor
+
+def make_executor(**kwargs):
+    rejected, waits = [], []
+    executor = ScoringExecutor("thread", on_reject=rejected.append, on_wait=waits.append, **kwargs)
+    return executor, rejected, waits
+
+async def start_blocked(executor, count):
+    """Occupy `count` workers with jobs that run until the returned event is set"""
+    release = threading.Event()
+    jobs = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(count)]
+    while executor.running < count:
+        await asyncio.sleep(0.001)
+    return release, jobs
+
+def test_runs_jobs_and_releases_slots():
+    executor, rejected, waits = make_executor(workers=2)
+
+    async def scenario():
+        return await asyncio.gather(*(executor.run(pow, 2, n) for n in range(10)))
+
+    assert asyncio.run(scenario()) == [2 ** n for n in range(10)]
+    assert (executor.running, executor.queue_depth, rejected, len(waits)) == (0, 0, [], 10)
+    executor.shutdown()
+
+def test_sheds_when_queue_is_full():
+    executor, rejected, _ = make_executor(workers=1, max_queue=2, queue_timeout=5.0)
+
+    async def scenario():
+        release, jobs = await start_blocked(executor, 1)
+        queued = [asyncio.ensure_future(executor.run(len, "ab")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert executor.queue_depth == 2
+        with pytest.raises(Overloaded) as excinfo:
+            await executor.run(len, "abc")
+        assert excinfo.value.reason == "queue_full"
+        release.set()
+        await asyncio.gather(*jobs)
+        return await asyncio.gather(*queued)
+
+    assert asyncio.run(scenario()) == [2, 2]
+    assert (executor.running, executor.queue_depth, rejected) == (0, 0, ["queue_full"])
+    executor.shutdown()
+
+def test_queue_timeout_rejects_and_frees_the_queue():
+    executor, rejected, _ = make_executor(workers=1, max_queue=4, queue_timeout=0.05)
+
+    async def scenario():
+        release, jobs = await start_blocked(executor, 1)
+        with pytest.raises(Overloaded) as excinfo:
+            await executor.run(len, "abc")
+        assert excinfo.value.reason == "queue_timeout"
+        assert executor.queue_depth == 0
+        release.set()
+        await asyncio.gather(*jobs)
+        # The slot freed by the blocked job is usable again
+        return await executor.run(len, "abcd")
+
+    assert asyncio.run(scenario()) == 4
+    assert (executor.running, executor.queue_depth, rejected) == (0, 0, ["queue_timeout"])
+    executor.shutdown()
+
+def test_cancelled_waiters_do_not_leak_slots():
+    executor, rejected, _ = make_executor(workers=1, max_queue=8, queue_timeout=5.0)
+
+    async def scenario():
+        release, jobs = await start_blocked(executor, 1)
+        waiting = [asyncio.ensure_future(executor.run(len, "ab")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        waiting[0].cancel()
+        waiting[2].cancel()
+        await asyncio.sleep(0.01)
+        assert executor.queue_depth == 1
+        release.set()
+        await asyncio.gather(*jobs)
+        assert await waiting[1] == 2
+        for job in (waiting[0], waiting[2]):
+            with pytest.raises(asyncio.CancelledError):
+                await job
+        # Cancelling a job that is already running gives its slot back only once it finishes
+        release.clear()
+        running = asyncio.ensure_future(executor.run(release.wait))
+        while executor.running < 1:
+            await asyncio.sleep(0.001)
+        running.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await running
+        queued = asyncio.ensure_future(executor.run(len, "abc"))
+        await asyncio.sleep(0.01)
+        try:
+            assert (executor.running, executor.queue_depth) == (1, 1)
+        finally:
+            release.set()
+        assert await queued == 3
+
+    asyncio.run(scenario())
+    assert (executor.running, executor.queue_depth, rejected) == (0, 0, [])
+    executor.shutdown()
+
+def test_run_local_shares_admission_control():
+    executor, rejected, _ = make_executor(workers=1, max_queue=0, queue_timeout=5.0)
+
+    async def scenario():
+        release, jobs = await start_blocked(executor, 1)
+        with pytest.raises(Overloaded):
+            await executor.run_local(len, "abc")
+        release.set()
+        await asyncio.gather(*jobs)
+        return await executor.run_local(len, "abc")
+
+    assert asyncio.run(scenario()) == 3
+    assert (executor.running, rejected) == (0, ["queue_full"])
+    executor.shutdown()
@@ -0,0 +1,102 @@
+"""
+/recommend paging and filters: top_k, offset and cursors, and filters that leave few or no candidates.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+DESCRIPTIONS = ["Build a simple todo app with React frontend", "enterprise java migration refactor on github", ""]
+
+@pytest.fixture
+def client(monkeypatch):
+    engine = main.RecommendationEngine(main.KNOWLEDGE_BASE_PATH, "")
+    engine.ensure_loaded()
+    monkeypatch.setattr(main, "engine", engine)
+    return TestClient(main.app)
+
+def recommend(client, description, **options):
+    response = client.post("/recommend", json={"description": description, **options})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def ranking(body):
+    return [(item["name"], item["score"]) for item in body["recommendations"]]
+
+def test_plain_requests_have_no_page(client):
+    assert "page" not in recommend(client, "react web app")
+    assert recommend(client, "react web app", top_k=3)["page"] == {
+        "offset": 0, "top_k": 3, "total": len(main.engine.snapshot.agent_names), "next_cursor": None,
+    }
+
+def test_cursor_pages_walk_the_full_ranking(client):
+    for description in DESCRIPTIONS:
+        full = recommend(client, description, top_k=main.MAX_TOP_K)
+        pages, cursor = [], None
+        while True:
+            body = recommend(client, description, top_k=1, **({"cursor": cursor} if cursor else {}))
+            pages.extend(ranking(body))
+            cursor = body["page"]["next_cursor"]
+            if cursor is None:
+                break
+        assert pages == ranking(full)
+        # An offset is the same page as the cursor that points at it
+        assert recommend(client, description, top_k=1, offset=1) == recommend(
+            client, description, top_k=1, cursor=main.encode_cursor(1))
+
+def test_cursor_takes_precedence_over_offset(client):
+    by_cursor = recommend(client, "react web app", top_k=1, offset=0, cursor=main.encode_cursor(2))
+    assert by_cursor["page"]["offset"] == 2
+    assert ranking(by_cursor) == ranking(recommend(client, "react web app", top_k=1, offset=2))
+
+def test_offsets_past_the_end_give_an_empty_page(client):
+    body = recommend(client, "react web app", offset=main.MAX_OFFSET)
+    assert body["recommendations"] == []
+    assert body["page"]["next_cursor"] is None
+
+@pytest.mark.parametrize("cursor", ["not base64!", main.encode_cursor(-1), main.encode_cursor(main.MAX_OFFSET + 1),
+                                    "eyJvZmZzZXQiOiB0cnVlfQ", "eyJwYWdlIjogMX0"])
+def test_invalid_cursors_are_400(client, cursor):
+    response = client.post("/recommend", json={"description": "react", "cursor": cursor})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("options", [{"offset": main.MAX_OFFSET + 1}, {"offset": -1}, {"top_k": 0},
+                                     {"top_k": main.MAX_TOP_K + 1}])
+def test_out_of_range_windows_are_422(client, options):
+    assert client.post("/recommend", json={"description": "react", **options}).status_code == 422
+
+@pytest.mark.parametrize("filters, names", [
+    ({"pricing_tier": "business"}, {"Copilot"}),
+    ({"project_type": "prototype"}, {"Replit"}),
+    ({"complexity": "complex"}, {"Copilot", "Cursor"}),
+    ({"ideal_for": ["enterprise", "security"]}, {"Copilot"}),
+    ({"complexity": "simple", "pricing_tier": "pro"}, {"Copilot", "Replit"}),
+])
+def test_filters_keep_unfiltered_scores(client, filters, names):
+    for description in DESCRIPTIONS:
+        scores = dict(ranking(recommend(client, description, top_k=main.MAX_TOP_K)))
+        body = recommend(client, description, top_k=main.MAX_TOP_K, filters=filters)
+        assert {name for name, _ in ranking(body)} == names
+        # A filter only removes candidates; it never changes the remaining agents' scores or order
+        assert ranking(body) == [(name, score) for name, score in scores.items() if name in names]
+        assert body["page"]["total"] == len(names)
+
+@pytest.mark.parametrize("filters", [
+    {"ideal_for": ["enterprise", "privacy"]},
+    {"pricing_tier": "no such tier"},
+    {"complexity": "very_complex", "project_type": "prototype"},
+])
+def test_filters_matching_nothing_give_an_empty_page(client, filters):
+    body = recommend(client, "react web app", filters=filters)
+    assert body["recommendations"] == []
+    assert body["page"] == {"offset": 0, "top_k": 3, "total": 0, "next_cursor": None}
+    assert body["task_analysis"] == recommend(client, "react web app")["task_analysis"]
+
+def test_filtered_pages_have_cursors(client):
+    body = recommend(client, "react web app", top_k=1, filters={"complexity": "medium"})
+    assert body["page"]["total"] == 3
+    second = recommend(client, "react web app", top_k=1, filters={"complexity": "medium"},
+                       cursor=body["page"]["next_cursor"])
+    assert second["page"]["offset"] == 1
+    assert ranking(body) + ranking(second) == ranking(
+        recommend(client, "react web app", top_k=2, filters={"complexity": "medium"}))
@@ -0,0 +1,90 @@
+"""
+Field projection and MessagePack content negotiation on /recommend and /recommend/batch.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+DESCRIPTIONS = ["Build a simple todo app with React frontend", "enterprise java migration refactor on github",
+                "deploy a python api backend", ""]
+
+@pytest.fixture
+def client(monkeypatch):
+    engine = main.RecommendationEngine(main.KNOWLEDGE_BASE_PATH, "")
+    engine.ensure_loaded()
+    monkeypatch.setattr(main, "engine", engine)
+    return TestClient(main.app)
+
+def recommend(client, description, headers=None, **options):
+    response = client.post("/recommend", json={"description": description, **options}, headers=headers or {})
+    assert response.status_code == 200, response.text
+    return response
+
+def test_fields_keep_only_the_requested_fields_in_response_order(client):
+    for description in DESCRIPTIONS:
+        full = recommend(client, description).json()
+        projected = recommend(client, description, fields=["score", "name"]).json()
+        assert projected["task_analysis"] == full["task_analysis"]
+        assert projected["recommendations"] == [
+            {"name": item["name"], "score": item["score"]} for item in full["recommendations"]
+        ]
+        assert [list(item) for item in projected["recommendations"]] == [["name", "score"]] * len(full["recommendations"])
+        # Asking for every field is the unprojected response, byte for byte
+        every = recommend(client, description, fields=list(reversed(main.RECOMMENDATION_FIELDS)))
+        assert every.content == recommend(client, description).content
+
+def test_unknown_and_empty_fields_are_rejected(client):
+    for fields in (["name", "price"], []):
+        response = client.post("/recommend", json={"description": "web app", "fields": fields})
+        assert response.status_code == 422
+
+def test_batch_items_are_projected_like_recommend(client):
+    tasks = [{"description": description, "fields": ["name", "tools"]} for description in DESCRIPTIONS]
+    tasks.append({"description": "react web app"})
+    lines = client.post("/recommend/batch", json=tasks).content.splitlines()
+    for task, line in zip(tasks, lines):
+        assert line == client.post("/recommend", json=task).content
+
+def test_msgpack_carries_the_same_document(client):
+    msgpack = pytest.importorskip("msgpack")
+    for description in DESCRIPTIONS:
+        for options in ({}, {"fields": ["name", "justification"]}, {"top_k": 2, "offset": 1}):
+            expected = recommend(client, description, **options).json()
+            response = recommend(client, description, headers={"Accept": "application/msgpack"}, **options)
+            assert response.headers["content-type"] == "application/msgpack"
+            assert "Accept" in response.headers["vary"]
+            assert msgpack.unpackb(response.content) == expected
+
+@pytest.mark.parametrize("accept, codec", [
+    ("", "json"),
+    ("*/*", "json"),
+    ("text/html", "json"),
+    ("application/json", "json"),
+    ("application/msgpack", "msgpack"),
+    ("application/x-msgpack, application/json;q=0.5", "msgpack"),
+    ("application/msgpack;q=0.5, application/json", "json"),
+    ("application/msgpack;q=0.5, */*;q=0.5", "json"),
+    ("application/vnd.msgpack;q=0.9, */*;q=0.1", "msgpack"),
+])
+def test_select_codec(accept, codec, monkeypatch):
+    monkeypatch.setitem(main.CODECS, "msgpack", main.MessagePackCodec())
+    assert main.select_codec(accept) == codec
+
+def test_msgpack_only_clients_get_406_without_msgpack(client, monkeypatch):
+    monkeypatch.delitem(main.CODECS, "msgpack", raising=False)
+    response = client.post("/recommend", json={"description": "web app"}, headers={"Accept": "application/msgpack"})
+    assert response.status_code == 406
+    # A client that also takes JSON falls back to it
+    response = client.post("/recommend", json={"description": "web app"},
+                           headers={"Accept": "application/msgpack, application/json;q=0.5"})
+    assert (response.status_code, response.headers["content-type"]) == (200, "application/json")
+
+def test_openapi_documents_both_media_types_and_optional_projected_fields(client):
+    spec = client.get("/openapi.json").json()
+    content = spec["paths"]["/recommend"]["post"]["responses"]["200"]["content"]
+    assert set(content) == {"application/json", "application/msgpack"}
+    schemas = spec["components"]["schemas"]
+    assert set(schemas["AgentRecommendation"]["required"]) == set(main.RECOMMENDATION_FIELDS)
+    assert set(schemas["ProjectedRecommendation"]["properties"]) == set(main.RECOMMENDATION_FIELDS)
+    assert "required" not in schemas["ProjectedRecommendation"]
@@ -0,0 +1,172 @@
+"""
+Checks the compiled engine against a copy of the original per-agent scorer.
+
+The BM25 and semantic signals are switched off in a copy of the knowledge base so the engine
+must reproduce the original algorithm exactly: the same floats, the same top 3 and the
+same response bytes.
+"""
+import json
+import random
+from typing import Dict, List
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+import main
+import reference_scorer as baseline
+
+# Response models of the original /recommend handler
+class AgentRecommendation(BaseModel):
+    name: str
+    score: float
+    justification: str
+    strengths: List[str]
+    use_cases: List[str]
+    pricing: str
+    tools: List[str]
+
+class RecommendationResponse(BaseModel):
+    recommendations: List[AgentRecommendation]
+    task_analysis: Dict[str, str]
+
+def baseline_response(agents, keyword_weights, description):
+    """The bytes the original /recommend handler sent, through FastAPI's response_model path"""
+    analysis = baseline.analyze_task(description)
+    recommendations = []
+    for agent_name, agent_data in agents.items():
+        score = baseline.calculate_score(agents, keyword_weights, agent_name, description, analysis)
+        recommendations.append(AgentRecommendation(
+            name=agent_name,
+            score=round(score, 2),
+            justification=baseline.generate_justification(agent_name, score, analysis),
+            strengths=agent_data["strengths"][:4],
+            use_cases=agent_data["use_cases"][:4],
+            pricing=agent_data["pricing"],
+            tools=agent_data["tools"][:6],
+        ))
+    recommendations.sort(key=lambda x: x.score, reverse=True)
+    response = RecommendationResponse(recommendations=recommendations[:3], task_analysis=analysis)
+    return JSONResponse(jsonable_encoder(response)).body
+
+# Fixtures
+FILLER = ["the", "a", "with", "for", "my", "team", "happy", "apps", "rapid", "Service", "capital", "newsletter",
+          "gitlab", "basically", "deploys", "servers", "ios", "android", "frontend", "production", "version control",
+          "first time", "experienced", "business", "share", "hosting", "quickly", "demo", "É", "ß", "İ"]
+
+def make_descriptions(agents, keyword_weights, count=400, seed=0):
+    """Random descriptions dense in keywords, ideal_for tags and near misses, in mixed case"""
+    rng = random.Random(seed)
+    vocabulary = list(keyword_weights) + [tag for data in agents.values() for tag in data.get("ideal_for", [])] + FILLER
+    descriptions = ["", "   ", "Build a simple todo app with React frontend"]
+    while len(descriptions) < count:
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(1, 12))]
+        words = [word.upper() if rng.random() < 0.1 else word.title() if rng.random() < 0.1 else word for word in words]
+        descriptions.append(rng.choice([" ", "", ", ", "-"]).join(words))
+    return descriptions
+
+@pytest.fixture(scope="module")
+def baseline_kb(tmp_path_factory):
+    """A copy of the knowledge base with the BM25 and semantic signals switched off"""
+    agents, keyword_weights, scoring = main.load_knowledge_base(main.KNOWLEDGE_BASE_PATH)
+    scoring = {**scoring, "bm25": {"weight": 0}, "semantic": {"weight": 0}}
+    path = tmp_path_factory.mktemp("kb") / "knowledge_base.json"
+    path.write_text(json.dumps({"agents": agents, "keyword_weights": keyword_weights, "scoring": scoring}))
+    return str(path), agents, keyword_weights
+
+@pytest.fixture
+def baseline_engine(baseline_kb, monkeypatch):
+    path = baseline_kb[0]
+    engine = main.RecommendationEngine(path, "")
+    engine.ensure_loaded()
+    monkeypatch.setattr(main, "engine", engine)
+    return engine
+
+@pytest.fixture
+def descriptions(baseline_kb):
+    return make_descriptions(baseline_kb[1], baseline_kb[2])
+
+# Tests
+def test_analysis_matches_baseline(baseline_engine, descriptions):
+    snapshot = baseline_engine.snapshot
+    for description in descriptions:
+        assert snapshot.analyze_task(description) == baseline.analyze_task(description), description
+
+def test_scores_are_bit_identical(baseline_kb, baseline_engine, descriptions):
+    _, agents, keyword_weights = baseline_kb
+    snapshot = baseline_engine.snapshot
+    matches = [snapshot.match_keywords(description) for description in descriptions]
+    analyses = [snapshot.analyze_task(description, match) for description, match in zip(descriptions, matches)]
+    batch = snapshot.score_agents_batch(analyses, matches)
+    for column, (description, match, analysis) in enumerate(zip(descriptions, matches, analyses)):
+        scores = snapshot.score_agents(analysis, match)
+        for index, agent_name in enumerate(snapshot.agent_names):
+            expected = baseline.calculate_score(agents, keyword_weights, agent_name, description, analysis)
+            # Exact float equality: the engine must add the same terms in the same order
+            assert float(scores[index]) == expected, (description, agent_name)
+            assert float(batch[index, column]) == expected, (description, agent_name)
+            assert snapshot.calculate_score(agent_name, description, analysis) == expected, (description, agent_name)
+
+def test_responses_are_byte_identical(baseline_kb, baseline_engine, descriptions):
+    _, agents, keyword_weights = baseline_kb
+    client = TestClient(main.app)
+    expected = [baseline_response(agents, keyword_weights, description) for description in descriptions]
+    for description, body in zip(descriptions, expected):
+        assert client.post("/recommend", json={"description": description}).content == body, description
+    batch = client.post("/recommend/batch", json=[{"description": description} for description in descriptions])
+    assert batch.content.splitlines() == expected
+
+@pytest.fixture(params=["baseline", "full", "semantic_capped"])
+def live_engine(request, baseline_engine, monkeypatch):
+    """The baseline engine, one with every signal of the shipped knowledge base (BM25, semantic) on,
+    and the same with descriptions outgrowing the semantic signal's max_chars"""
+    if request.param == "baseline":
+        return baseline_engine
+    engine = main.RecommendationEngine(main.KNOWLEDGE_BASE_PATH, "")
+    engine.ensure_loaded()
+    if request.param == "semantic_capped":
+        engine.snapshot.semantic.max_chars = 60
+    monkeypatch.setattr(main, "engine", engine)
+    return engine
+
+def test_live_session_matches_full_rescan(live_engine, descriptions):
+    snapshot = live_engine.snapshot
+    rng = random.Random(1)
+    for _ in range(40):
+        session = main.LiveSession(snapshot)
+        text = ""
+        for _ in range(25):
+            if text and rng.random() < 0.4:
+                start = rng.randint(0, len(text))
+                end = min(len(text), start + rng.randint(0, 20))
+                insert = rng.choice(["", " ", "api", "web app", "É", "İ"])
+            else:
+                start = end = rng.randint(0, len(text))
+                insert = rng.choice(descriptions)[:rng.randint(0, 40)]
+            session.apply_edit(main.TaskEdit(start=start, end=end, text=insert))
+            text = text[:start] + insert + text[end:]
+            live, full = session.matches(), snapshot.match_keywords(text)
+            assert session.description == text
+            assert (set(live), live.bm25, live.mask, live.semantic) == (set(full), full.bm25, full.mask, full.semantic), text
+        response = session.recommendations() or session.last_response
+        assert response == main.recommend(text)
+
+def test_live_errors_carry_recovery_codes(baseline_engine, monkeypatch):
+    monkeypatch.setattr(main, "LIVE_MAX_DESCRIPTION_CHARS", 20)
+    client = TestClient(main.app)
+    with client.websocket_connect("/recommend/live") as ws:
+        ws.send_text(json.dumps({"description": "simple web app"}))
+        assert "recommendations" in json.loads(ws.receive_text())
+        ws.send_text(json.dumps({"start": 15, "end": 15, "text": "x"}))
+        assert json.loads(ws.receive_text())["code"] == "range"
+        ws.send_text(json.dumps({"start": 14, "end": 14, "text": " for my whole team"}))
+        error = json.loads(ws.receive_text())
+        assert (error["code"], error["max_chars"]) == ("too_long", 20)
+        ws.send_text(json.dumps({"description": "x" * 21}))
+        assert json.loads(ws.receive_text())["code"] == "too_long"
+        ws.send_text(json.dumps({"start": "a"}))
+        assert json.loads(ws.receive_text())["code"] == "invalid"
+        ws.send_text("not json")
+        assert json.loads(ws.receive_text())["code"] == "invalid"
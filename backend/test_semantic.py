@@ -0,0 +1,58 @@
+"""
+The semantic index's LSH lookup against exhaustive comparison of the same phrases.
+"""
+import random
+
+import pytest
+
+from main import SemanticIndex, tokenize
+
+WORDS = ["build", "deploy", "react", "django", "mobile", "android", "payments", "dashboard", "migrate", "legacy",
+         "refactor", "prototype", "enterprise", "pipeline", "realtime", "chat", "testing", "kubernetes", "api",
+         "analytics", "scraper", "game", "extension", "embedded", "firmware", "database", "search", "billing"]
+
+def make_phrases(agents=120, per_agent=6, seed=0):
+    rng = random.Random(seed)
+    return [[" ".join(rng.sample(WORDS, 4)) for _ in range(per_agent)] for _ in range(agents)]
+
+@pytest.fixture(scope="module")
+def phrases():
+    return make_phrases()
+
+@pytest.fixture(scope="module")
+def indexes(phrases):
+    """The same catalog with and without the LSH index"""
+    lsh = SemanticIndex(phrases, lsh_min_rows=512, step=0.001)
+    exhaustive = SemanticIndex(phrases, lsh_min_rows=10 ** 6, step=0.001)
+    assert lsh.lsh and not exhaustive.lsh
+    return lsh, exhaustive
+
+def query(index, text):
+    return dict(index.query(index.vectorize(tokenize(text))))
+
+def test_lsh_finds_exact_phrases(indexes, phrases):
+    lsh, exhaustive = indexes
+    for agent in range(0, len(phrases), 7):
+        text = phrases[agent][0]
+        found, expected = query(lsh, text), query(exhaustive, text)
+        # The phrase is always in its own bucket, so its agent scores a perfect 1.0 either way
+        assert found[agent] == expected[agent] == 1000, text
+
+def test_lsh_never_overstates_similarity(indexes):
+    lsh, exhaustive = indexes
+    rng = random.Random(1)
+    found_total = expected_total = 0
+    for _ in range(100):
+        text = " ".join(rng.sample(WORDS, rng.randint(2, 6)))
+        found, expected = query(lsh, text), query(exhaustive, text)
+        # LSH compares a subset of the phrases exactly, so it can miss agents but never inflate one
+        for agent, level in found.items():
+            assert level <= expected[agent], (text, agent)
+        found_total += len(found)
+        expected_total += len(expected)
+    assert found_total >= 0.9 * expected_total
+
+def test_small_catalogs_are_compared_exhaustively(phrases):
+    index = SemanticIndex(phrases[:10])
+    assert not index.lsh
+    assert query(index, "") == {}
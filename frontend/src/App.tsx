@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import {
   MantineProvider,
   Container,
@@ -42,12 +42,103 @@ interface Recommendation {
   };
 }
 
+const LIVE_URL = "ws://localhost:8000/recommend/live";
+
+const isHighSurrogate = (code: number) => code >= 0xd800 && code <= 0xdbff;
+const isLowSurrogate = (code: number) => code >= 0xdc00 && code <= 0xdfff;
+const codePoints = (text: string) => Array.from(text).length;
+
+// The single edit that turns `before` into `after`: the changed middle between their common prefix and suffix
+const diffEdit = (before: string, after: string) => {
+  let start = 0;
+  while (start < before.length && start < after.length && before[start] === after[start]) {
+    start++;
+  }
+  let suffix = 0;
+  while (
+    suffix < before.length - start &&
+    suffix < after.length - start &&
+    before[before.length - 1 - suffix] === after[after.length - 1 - suffix]
+  ) {
+    suffix++;
+  }
+  // Never split a surrogate pair: the server counts offsets in code points, not UTF-16 units
+  if (start > 0 && isHighSurrogate(before.charCodeAt(start - 1))) {
+    start--;
+  }
+  if (suffix > 0 && isLowSurrogate(before.charCodeAt(before.length - suffix))) {
+    suffix--;
+  }
+  const end = before.length - suffix;
+  return {
+    start: codePoints(before.slice(0, start)),
+    end: codePoints(before.slice(0, end)),
+    text: after.slice(start, after.length - suffix),
+  };
+};
+
+// Send the whole description unless the server would reject it as too long; returns whether it was sent
+const sendDescription = (ws: WebSocket, text: string, maxChars: number) => {
+  if (codePoints(text) > maxChars) {
+    return false;
+  }
+  ws.send(JSON.stringify({ description: text }));
+  return true;
+};
+
 function App() {
   const [task, setTask] = useState("");
   const [recommendations, setRecommendations] = useState<Recommendation | null>(
     null
   );
   const [loading, setLoading] = useState(false);
+  const socket = useRef<WebSocket | null>(null);
+  const sentTask = useRef("");
+  // Longest description the server accepts, learned from its first "too_long" error
+  const maxChars = useRef(Infinity);
+  // Set while the server's text differs from sentTask and has to be resent in full
+  const outOfSync = useRef(false);
+
+  // Live recommendations while typing; the submit button still works without the socket
+  useEffect(() => {
+    const ws = new WebSocket(LIVE_URL);
+    ws.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (!data.error) {
+        setRecommendations(data);
+      } else if (data.code === "range") {
+        // An edit did not fit the server's text, so resynchronize with the full text
+        outOfSync.current = !sendDescription(ws, sentTask.current, maxChars.current);
+      } else if (data.code === "too_long") {
+        // Stop sending edits until the text is short enough to resend in full
+        maxChars.current = data.max_chars;
+        outOfSync.current = !sendDescription(ws, sentTask.current, maxChars.current);
+      }
+      // "overloaded" bursts are retried by the server; "invalid" messages are dropped
+    };
+    ws.onopen = () => {
+      if (sentTask.current) {
+        outOfSync.current = !sendDescription(ws, sentTask.current, maxChars.current);
+      }
+    };
+    socket.current = ws;
+    return () => ws.close();
+  }, []);
+
+  const updateTask = (value: string) => {
+    setTask(value);
+    const ws = socket.current;
+    const previous = sentTask.current;
+    sentTask.current = value;
+    if (!ws || ws.readyState !== WebSocket.OPEN || value === previous) {
+      return;
+    }
+    if (outOfSync.current || codePoints(value) > maxChars.current) {
+      outOfSync.current = !sendDescription(ws, value, maxChars.current);
+    } else {
+      ws.send(JSON.stringify(diffEdit(previous, value)));
+    }
+  };
 
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -176,7 +267,7 @@ function App() {
                 <Textarea
                   placeholder="Describe your coding task..."
                   value={task}
-                  onChange={(e) => setTask(e.target.value)}
+                  onChange={(e) => updateTask(e.target.value)}
                   minRows={4}
                   size="lg"
                   radius="md"
@@ -203,7 +294,7 @@ function App() {
                         variant="light"
                         size="xs"
                         radius="xl"
-                        onClick={() => setTask(example)}
+                        onClick={() => updateTask(example)}
                       >
                         {example}
                       </Button>